@@ -0,0 +1,100 @@
+from typing import Iterator
+
+import numpy as np
+
+from labeling import bond_endpoints, connected_components
+from settings import *
+from spanning import HORIZONTAL, border_nodes, sides_of
+
+
+class GridBatch:
+    """A stack of independent grids sampled and labeled together.
+
+    Links are kept as ``(n_grids, width, height)`` arrays and the whole
+    stack is labeled as one disconnected lattice, so sampling a thousand
+    small grids costs a handful of NumPy calls instead of a Python loop.
+    Cluster labels in ``clusters`` are numbered across the whole batch.
+    """
+
+    def __init__(self, n_grids: int, width: int=WIDTH, height: int=HEIGHT,
+                 prob: float=PROBABILITY, rng: np.random.Generator=None,
+                 update_on_init=True) -> None:
+        self.n_grids = n_grids
+        self.size = self.width, self.height = width, height
+        self.n_nodes = width * height
+        self.prob = prob
+        self.rng = np.random.default_rng() if rng is None else rng
+
+        self.shape = (n_grids, width, height)
+        self.horizontal_links = np.zeros(self.shape, bool)
+        self.vertical_links = np.zeros(self.shape, bool)
+        self.clusters = np.zeros(self.shape, np.uint32)
+        self.cluster_sizes = np.zeros(1, np.int64)
+        self.cluster_grids = np.zeros(1, np.int64)
+
+        if update_on_init:
+            self.update()
+
+    def flood(self) -> None:
+        links = self.rng.random((2, *self.shape)) < self.prob
+        self.horizontal_links, self.vertical_links = links
+        self.horizontal_links[:, -1, :] = False
+        self.vertical_links[:, :, -1] = False
+
+    def find_clusters(self) -> None:
+        u, v = bond_endpoints(self.horizontal_links, self.vertical_links)
+        roots = connected_components(self.horizontal_links.size, u, v)
+        is_root = roots == np.arange(roots.size)
+        names = np.cumsum(is_root, dtype=np.uint32)
+        self.clusters = names[roots].reshape(self.shape)
+        self.cluster_sizes = np.bincount(self.clusters.ravel())
+        self.cluster_grids = np.concatenate(((-1, ), np.flatnonzero(is_root) // self.n_nodes))
+
+    def update(self) -> None:
+        self.flood()
+        self.find_clusters()
+
+    def n_clusters(self) -> np.ndarray:
+        return np.bincount(self.cluster_grids[1:], minlength=self.n_grids)
+
+    def largest_cluster(self) -> np.ndarray:
+        largest = np.zeros(self.n_grids, np.int64)
+        np.maximum.at(largest, self.cluster_grids[1:], self.cluster_sizes[1:])
+        return largest
+
+    def is_leaks(self, direction: str=HORIZONTAL) -> np.ndarray:
+        """Spanning flag of every grid, read from the batch labels."""
+        borders = border_nodes(self.width, self.height)
+        flat_clusters = self.clusters.reshape(self.n_grids, -1)
+        spanning = np.ones(len(self.cluster_sizes), bool)
+        for a, b in sides_of(direction):
+            touches_a = np.zeros(len(self.cluster_sizes), bool)
+            touches_b = np.zeros(len(self.cluster_sizes), bool)
+            touches_a[flat_clusters[:, borders[a]]] = True
+            touches_b[flat_clusters[:, borders[b]]] = True
+            spanning &= touches_a & touches_b
+        spanning[0] = False
+        leaks = np.bincount(self.cluster_grids[spanning], minlength=self.n_grids)
+        return leaks > 0
+
+    def mean_cluster_sizes(self) -> np.ndarray:
+        """Mean size of the cluster of a random node, sum of s^2 / N, per grid."""
+        squares = np.bincount(self.cluster_grids[1:], self.cluster_sizes[1:]**2.0,
+                              minlength=self.n_grids)
+        return squares / self.n_nodes
+
+    def size_histograms(self) -> np.ndarray:
+        """Number of clusters of every size, one row per grid."""
+        index = self.cluster_grids[1:] * (self.n_nodes+1) + self.cluster_sizes[1:]
+        counts = np.bincount(index, minlength=self.n_grids*(self.n_nodes+1))
+        return counts.reshape(self.n_grids, self.n_nodes+1)
+
+    def size_histogram(self) -> np.ndarray:
+        """Number of clusters of every size, summed over the batch."""
+        return np.bincount(self.cluster_sizes[1:], minlength=self.n_nodes+1)
+
+
+def batch_sizes(n_grids: int, width: int, height: int) -> Iterator[int]:
+    per_batch = max(1, BATCH_NODES // (width*height))
+    for start in range(0, n_grids, per_batch):
+        yield min(per_batch, n_grids - start)
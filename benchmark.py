@@ -0,0 +1,203 @@
+"""Timing and memory benchmarks of the simulation without the GUI.
+
+    python benchmark.py run -o results.json
+    python benchmark.py compare old.json new.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+from graphics import Drawer
+from grid import Grid
+from sweep import run_sweep, size_histogram
+
+SIZES = 10, 40, 100, 400, 1000, 4000
+PROBS = 0.4, 0.5, 0.6
+REPEAT = 3
+SWEEP_NODES = 2**22
+RENDER_WINDOW = 256
+THRESHOLD = 0.1
+MIN_TIME = 1e-3
+
+Case = Callable[[int, float, int], Tuple[Callable[[], None], int]]
+
+
+def flooded(size: int, prob: float, seed: int, labeled: bool=False) -> Grid:
+    grid = Grid(size, size, prob, find_all_clusters=labeled,
+                update_on_init=False, seed=seed)
+    grid.update()
+    return grid
+
+
+def update_case(size: int, prob: float, seed: int) -> Tuple[Callable[[], None], int]:
+    grid = Grid(size, size, prob, find_all_clusters=False,
+                update_on_init=False, seed=seed)
+    return grid.update, size*size
+
+
+def find_clusters_case(size: int, prob: float, seed: int) -> Tuple[Callable[[], None], int]:
+    return flooded(size, prob, seed).find_clusters, size*size
+
+
+def is_leaks_case(size: int, prob: float, seed: int) -> Tuple[Callable[[], None], int]:
+    grid = flooded(size, prob, seed)
+
+    def is_leaks() -> None:
+        grid.links_changed()
+        grid.is_leaks()
+    return is_leaks, size*size
+
+
+def compute_image_case(size: int, prob: float, seed: int) -> Tuple[Callable[[], None], int]:
+    """Full redraw of a viewport of at most ``RENDER_WINDOW`` nodes a side."""
+    drawer = Drawer(flooded(size, prob, seed, labeled=True), seed)
+    drawer.set_properties(4, 1, 2)
+    drawer.set_window((0, RENDER_WINDOW, 0, RENDER_WINDOW))
+
+    def draw() -> None:
+        drawer.forget_image()
+        drawer.compute_image()
+    window = min(size, RENDER_WINDOW)
+    return draw, window*window
+
+
+def sweep_case(size: int, prob: float, seed: int) -> Tuple[Callable[[], None], int]:
+    """Cluster size histogram sweep over about ``SWEEP_NODES`` nodes, in process."""
+    n_trials = max(SWEEP_NODES // (size*size), 1)
+    work = [((size, size), prob, n_trials)]
+
+    def sweep() -> None:
+        run_sweep(size_histogram, work, 1, seed, tqdm(disable=True))
+    return sweep, n_trials*size*size
+
+
+CASES: Dict[str, Case] = {
+    'update': update_case,
+    'find_clusters': find_clusters_case,
+    'is_leaks': is_leaks_case,
+    'compute_image': compute_image_case,
+    'sweep': sweep_case,
+}
+
+
+def measure(case: Case, size: int, prob: float, repeat: int, seed: int) -> dict:
+    """Best wall time of ``repeat`` runs and peak traced memory of one more."""
+    run, n_nodes = case(size, prob, seed)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(times)
+    return {'time': best, 'times': times, 'peak_memory': peak,
+            'nodes': n_nodes, 'throughput': n_nodes / best if best else float('inf')}
+
+
+def run_benchmarks(cases: List[str], sizes: List[int], probs: List[float],
+                   repeat: int=REPEAT, seed: int=0) -> dict:
+    results = []
+    matrix = [(name, size, prob) for name in cases for size in sizes for prob in probs]
+    for name, size, prob in tqdm(matrix):
+        result = measure(CASES[name], size, prob, repeat, seed)
+        results.append({'case': name, 'size': size, 'prob': prob, **result})
+    return {'meta': {'date': datetime.now().isoformat(timespec='seconds'),
+                     'python': sys.version.split()[0],
+                     'numpy': np.__version__,
+                     'platform': platform.platform(),
+                     'repeat': repeat, 'seed': seed},
+            'results': results}
+
+
+def compare(old: dict, new: dict, threshold: float=THRESHOLD,
+            min_time: float=MIN_TIME) -> List[dict]:
+    """Rows present in both runs, flagged when time or memory grew more than ``threshold``.
+
+    Time differences below ``min_time`` seconds are treated as noise.
+    """
+    key = lambda row: (row['case'], row['size'], row['prob'])
+    old_rows = {key(row): row for row in old['results']}
+    rows = []
+    for row in new['results']:
+        if key(row) not in old_rows:
+            continue
+        before = old_rows[key(row)]
+        time_ratio = row['time'] / before['time'] if before['time'] else float('inf')
+        memory_ratio = (row['peak_memory'] / before['peak_memory']
+                        if before['peak_memory'] else 1.0)
+        slower = time_ratio > 1 + threshold and row['time'] - before['time'] > min_time
+        rows.append({'case': row['case'], 'size': row['size'], 'prob': row['prob'],
+                     'time_ratio': time_ratio, 'memory_ratio': memory_ratio,
+                     'regression': slower or memory_ratio > 1 + threshold})
+    return rows
+
+
+def print_results(report: dict) -> None:
+    print(f"{'case':<14}{'size':>6}{'prob':>6}{'time, s':>12}{'peak, MB':>11}{'nodes/s':>12}")
+    for row in report['results']:
+        print(f"{row['case']:<14}{row['size']:>6}{row['prob']:>6}{row['time']:>12.5f}"
+              f"{row['peak_memory']/2**20:>11.2f}{row['throughput']:>12.3g}")
+
+
+def print_comparison(rows: List[dict]) -> None:
+    print(f"{'case':<14}{'size':>6}{'prob':>6}{'time':>9}{'memory':>9}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['case']:<14}{row['size']:>6}{row['prob']:>6}"
+              f"{row['time_ratio']:>8.2f}x{row['memory_ratio']:>8.2f}x{flag}")
+
+
+def main(argv: List[str]=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="run the benchmarks")
+    run.add_argument('-o', '--output', help="JSON file for the results")
+    run.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    run.add_argument('--sizes', nargs='+', type=int, default=list(SIZES))
+    run.add_argument('--probs', nargs='+', type=float, default=list(PROBS))
+    run.add_argument('--repeat', type=int, default=REPEAT)
+    run.add_argument('--seed', type=int, default=0)
+
+    diff = commands.add_parser('compare', help="flag regressions between two result files")
+    diff.add_argument('old')
+    diff.add_argument('new')
+    diff.add_argument('--threshold', type=float, default=THRESHOLD,
+                      help="relative growth of time or memory counted as regression")
+    diff.add_argument('--min-time', type=float, default=MIN_TIME,
+                      help="smallest time growth in seconds counted as regression")
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        report = run_benchmarks(args.cases, args.sizes, args.probs, args.repeat, args.seed)
+        print_results(report)
+        if args.output is not None:
+            with open(args.output, 'w') as file:
+                json.dump(report, file, indent=1)
+        return 0
+
+    with open(args.old) as file:
+        old = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+    rows = compare(old, new, args.threshold, args.min_time)
+    print_comparison(rows)
+    return int(any(row['regression'] for row in rows))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
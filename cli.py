@@ -0,0 +1,164 @@
+"""Compute the data of the plots from the command line, without a GUI.
+
+    python cli.py sizes --sizes 10 40 --workers 8 -o plots/Sizes_plot.npy
+    python cli.py cluster-sizes --size 40 40 --trials 100000 --store runs/cs
+    python cli.py average-size --probs 0 1 101 --method newman_ziff --plot
+
+tkinter and matplotlib are only imported with ``--plot``, the models
+in ``models.py`` do the work.
+"""
+import argparse
+import sys
+from typing import List
+
+import numpy as np
+
+from models import (Area_model, Average_size_model, Cluster_sizes_model,
+                    Distr_per_prob_model, Model, Sizes_model, Threshold_model)
+from settings import *
+from threshold import NU
+
+METHODS = 'sampling', 'newman_ziff', 'adaptive'
+PLOTS = {
+    'sizes': (Sizes_model, 'Sizes_plot'),
+    'cluster-sizes': (Cluster_sizes_model, 'Cluster_sizes'),
+    'cluster-sizes-log': (Cluster_sizes_model, 'Cluster_sizes_log'),
+    'average-size': (Average_size_model, 'Average_size'),
+    'distr-per-prob': (Distr_per_prob_model, 'Distr_per_prob'),
+    'area': (Area_model, 'AreaPlot'),
+    'threshold': (Threshold_model, 'Threshold_plot'),
+}
+
+
+def prob_points(args: argparse.Namespace) -> np.ndarray:
+    start, stop, num = args.probs
+    return np.linspace(start, stop, int(num))
+
+
+def compute(args: argparse.Namespace) -> Model:
+    model = PLOTS[args.command][0](args.seed)
+    if args.command == 'sizes':
+        model.sizes = np.arange(*args.sizes)
+        model.prob_points = prob_points(args)
+        model.total_n_points = args.trials
+        model.target, model.budget = args.target, args.budget
+        model.calculate(args.workers, args.method)
+    elif args.command in ('cluster-sizes', 'cluster-sizes-log'):
+        model.size, model.prob, model.n_grids = tuple(args.size), args.prob, args.trials
+        model.calculate(args.workers, args.store)
+    elif args.command == 'average-size':
+        model.size, model.n_grids = tuple(args.size), args.trials
+        model.prob_points = prob_points(args)
+        model.target = args.target
+        model.calculate(args.workers, args.method)
+    elif args.command == 'distr-per-prob':
+        model.size, model.n_grids = tuple(args.size), args.trials
+        model.prob_points = prob_points(args)
+        model.calculate(args.workers)
+    elif args.command == 'area':
+        model.size, model.total_n_points = tuple(args.size), args.trials
+        model.eps = np.linspace(0, args.eps, args.n_eps)
+        model.calculate()
+    elif args.command == 'threshold':
+        model.sizes = np.array(args.sizes)
+        model.n_samples = args.trials
+        model.nu = None if args.fit_nu else args.nu
+        model.calculate(args.workers)
+        print_thresholds(model)
+    return model
+
+
+def print_thresholds(model: Threshold_model) -> None:
+    for size, threshold, low, high in zip(*model.data):
+        print(f"L = {int(size):>5}: p_c = {threshold:.4f} [{low:.4f}, {high:.4f}]")
+    if len(model.sizes) > 2:
+        fit = model.fit()
+        print(f"p_c(L) = p_c + a L^(-1/nu): p_c = {fit['p_c']:.5f} ± {fit['p_c_error']:.5f}, "
+              f"a = {fit['a']:.4f}, nu = {fit['nu']:.3f}, chi2/dof = {fit['chi2']:.2f}/{fit['dof']}")
+
+
+def show(command: str, model: Model) -> None:
+    import tkinter as tk
+
+    import plotter
+    root = tk.Tk()
+    plot = getattr(plotter, PLOTS[command][1])(root, model=model)
+    plot.pack(fill=tk.BOTH, expand=True)
+    plot.update()
+    root.mainloop()
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def command(name: str, help: str, size: tuple, probs: tuple,
+                trials: int) -> argparse.ArgumentParser:
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument('-o', '--output', help="file for the data, .npy or .npz")
+        sub.add_argument('--plot', action='store_true', help="show the plot when done")
+        sub.add_argument('--workers', type=int, default=N_WORKERS,
+                         help="worker processes, 1 runs in this process")
+        sub.add_argument('--seed', type=int)
+        sub.add_argument('--trials', type=int, default=trials)
+        if size is not None:
+            sub.add_argument('--size', nargs=2, type=int, default=size,
+                             metavar=('WIDTH', 'HEIGHT'))
+        if probs is not None:
+            sub.add_argument('--probs', nargs=3, type=float, default=probs,
+                             metavar=('START', 'STOP', 'NUM'))
+        return sub
+
+    sizes = command('sizes', "leak chance per lattice size and probability",
+                    None, (0, 1, 20), 10**2)
+    sizes.add_argument('--sizes', nargs=2, type=int, default=(10, 40),
+                       metavar=('FROM', 'TO'), help="square lattice sizes FROM <= L < TO")
+    sizes.add_argument('--method', choices=METHODS, default='sampling')
+    sizes.add_argument('--target', type=float, default=0.05,
+                       help="adaptive: half width of the 95%% interval of every point")
+    sizes.add_argument('--budget', type=int, default=10**5,
+                       help="adaptive: trials for the whole surface")
+
+    for name in ('cluster-sizes', 'cluster-sizes-log'):
+        sub = command(name, "share of clusters of every size", SIZE, None, 10**5)
+        sub.add_argument('--prob', type=float, default=PROBABILITY)
+        sub.add_argument('--store', help="directory to checkpoint and resume the run")
+
+    average = command('average-size', "mean cluster size per probability",
+                      (40, 40), (0, 1, 101), 10**3)
+    average.add_argument('--method', choices=METHODS, default='sampling')
+    average.add_argument('--target', type=float, default=0.02,
+                         help="adaptive: half width of the 95%% interval relative to the mean, "
+                              "--trials is the mean number of grids per point")
+
+    command('distr-per-prob', "cluster size distribution per probability",
+            (5, 5), (0, 1, 21), 10**5)
+
+    area = command('area', "mean cluster area near p = 0.5", (40, 40), None, 100)
+    area.add_argument('--eps', type=float, default=0.001,
+                      help="widest neighbourhood of 0.5")
+    area.add_argument('--n-eps', type=int, default=10)
+
+    threshold = command('threshold', "spanning threshold per size with a scaling fit",
+                        None, None, 200)
+    threshold.add_argument('--sizes', nargs='+', type=int, default=[16, 32, 64, 128, 256],
+                           help="square lattice sizes; --trials is the samples per size")
+    threshold.add_argument('--nu', type=float, default=NU,
+                           help="correlation length exponent of the fit")
+    threshold.add_argument('--fit-nu', action='store_true', help="fit nu as well")
+    return parser
+
+
+def main(argv: List[str]=None) -> int:
+    args = make_parser().parse_args(argv)
+    model = compute(args)
+    if args.output is not None:
+        model.save(args.output)
+    if args.plot:
+        show(args.command, model)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
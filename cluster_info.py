@@ -1,8 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
-from collections import Counter
 
-from grid import Cluster, Grid
+from grid import Cluster
+from models import Cluster_count_model
 from plotter import BasePlotter
 
 
@@ -12,12 +12,16 @@ class Cluster_info(tk.Toplevel):
         super().__init__(parent)
         self.title("Percolation - Cluster Info")
         self.cluster = cluster
+        self.key = cluster.name, cluster.grid.labels_version
 
         center_of_mass = tuple(round(i, 3) for i in self.cluster.center_of_mass)
         info = {"Name": self.cluster.name,
                 "Area": self.cluster.area,
                 "Center of mass": center_of_mass,
-                "Radius": self.cluster.radius}
+                "Radius": self.cluster.radius,
+                "Radius of gyration": round(self.cluster.radius_of_gyration, 3),
+                "Bounding box": self.cluster.bounding_box,
+                "Touches": ', '.join(sorted(self.cluster.touches)) or '-'}
         
         for i, (title, value) in enumerate(info.items()):
             ttk.Label(self, text=str(title)+':', font=('Helvetica', 12))\
@@ -30,23 +34,8 @@ class Cluster_info(tk.Toplevel):
                       pady=(0, 10))
 
 
-class Cluster_count(BasePlotter):
-
-    def __init__(self, parent, grid: Grid) -> None:
-        super().__init__(parent)
-        self.parent = parent
-        self.title("Percolation - Analyse")
-        self.grid = grid
-        self.update()
-        
-    def count_clusters(self) -> dict:
-        counter = Counter()
-        for cluster in self.grid.clusters_list[1:]:
-            counter[len(cluster.nodes)] += 1
-        x = sorted(counter.keys())[:30]
-        y = [counter[i] for i in x]
-        x = list(map(str, x))
-        return x, y
+class Cluster_count_plot(BasePlotter):
+    MODEL = Cluster_count_model
     
     def create_axes(self) -> None:
         self.axes = self.figure.add_subplot()
@@ -58,6 +47,29 @@ class Cluster_count(BasePlotter):
         self.axes.tick_params(axis='x', labelrotation=45)
 
     def set_data(self) -> None:
-        data = self.count_clusters()
-        self.axes.bar(*data)
+        x, y = self.data
+        self.axes.bar(list(map(str, x)), y)
+
 
+class Cluster_count(tk.Toplevel):
+    """Cluster sizes of the grid of ``painter``, counted on its worker thread."""
+
+    def __init__(self, parent, painter) -> None:
+        super().__init__(parent)
+        self.parent = parent
+        self.title("Percolation - Analyse")
+        self.painter = painter
+        self.grid = painter.grid
+        self.plot = Cluster_count_plot(self, model=Cluster_count_model(self.grid))
+        self.plot.pack(fill=tk.BOTH, expand=True)
+        self.update()
+    
+    def update(self) -> None:
+        if self.plot.model.current():
+            return
+        self.painter.request(sync=self.plot.calculate_data, property_changed=False,
+                             on_done=self.on_counted)
+    
+    def on_counted(self) -> None:
+        if self.winfo_exists() and self.plot.model.data is not None:
+            self.plot.update()
@@ -0,0 +1,72 @@
+from typing import Sequence
+
+import numpy as np
+
+Z_95 = 1.959963984540054
+
+
+class RunningStats:
+    """Streaming count, mean and variance of a sample (Welford).
+
+    Batches are folded in with the pairwise update of Chan et al., so
+    partial results of sweep pieces can be added in any order and give
+    the same moments as one pass over all values.
+    """
+
+    def __init__(self, count: int=0, mean: float=0.0, m2: float=0.0) -> None:
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    @classmethod
+    def of(cls, values: Sequence[float]) -> 'RunningStats':
+        values = np.asarray(values, float).ravel()
+        if not len(values):
+            return cls()
+        mean = float(np.mean(values))
+        return cls(len(values), mean, float(np.sum((values - mean)**2)))
+
+    def add_values(self, values: Sequence[float]) -> None:
+        self.merge(RunningStats.of(values))
+
+    def merge(self, other: 'RunningStats') -> None:
+        count = self.count + other.count
+        if not count:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else float('inf')
+
+    @property
+    def std_error(self) -> float:
+        return np.sqrt(self.variance / self.count) if self.count else float('inf')
+
+    def half_width(self, z: float=Z_95) -> float:
+        """Half width of the normal confidence interval of the mean."""
+        return z * self.std_error
+
+    def __add__(self, other: 'RunningStats') -> 'RunningStats':
+        result = RunningStats(self.count, self.mean, self.m2)
+        result.merge(other)
+        return result
+
+
+def agresti_coull_variance(count: int, mean: float, z: float=Z_95) -> float:
+    """Variance of a 0/1 value from the Agresti-Coull estimate of its chance.
+
+    Adding ``z**2/2`` successes and failures keeps it above zero when
+    every value seen so far was the same.
+    """
+    total = count + z**2
+    chance = (count*mean + z**2/2) / total
+    return chance * (1 - chance)
+
+
+def agresti_coull_half_width(stats: RunningStats, z: float=Z_95) -> float:
+    """Half width of the Agresti-Coull confidence interval of a chance."""
+    return z * np.sqrt(agresti_coull_variance(stats.count, stats.mean, z) / (stats.count + z**2))
@@ -0,0 +1,178 @@
+"""Data of every plot, computed without any GUI imports."""
+from typing import Sequence, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+from batch import GridBatch, batch_sizes
+from estimators import agresti_coull_half_width
+from grid import Grid, Seed
+from histogram import SizeHistogram
+from settings import *
+from store import ResultStore
+from sweep import (leak_count, leak_stats, mean_size_stats, newman_ziff_sweep,
+                   run_adaptive, run_stored, run_sweep, size_histogram,
+                   threshold_samples)
+from threshold import NU, fss_fit
+
+Data = Tuple[np.ndarray, ...]
+
+
+def save_data(file: str, data: Data) -> None:
+    """``.npy`` files keep the arrays stacked as the old plots did, others are npz."""
+    if str(file).endswith('.npy'):
+        np.save(file, np.stack(data))
+    else:
+        np.savez(file, *data)
+
+
+def trial_counts(prob_points: np.ndarray, total: int) -> np.ndarray:
+    """Split ``total`` trials over ``prob_points``, more of them close to 0.5.
+
+    The distance to 0.5 is floored at half a step of an even grid of the
+    same length, so a point at 0.5 itself gets a finite share.
+    """
+    prob_points = np.asarray(prob_points, float)
+    distance = np.maximum(np.abs(prob_points-0.5), 0.5/max(len(prob_points), 1))
+    weights = 1/distance
+    return (weights / np.sum(weights) * total + 1).astype(int)
+
+
+def leak_surface(sizes: Sequence[int], prob_points: np.ndarray, n_tests: np.ndarray,
+                 n_workers: int=N_WORKERS, method: str='sampling',
+                 seed: int=None, target: float=None, budget: int=None) -> Data:
+    """Chance of a leak for every square lattice size and probability.
+
+    The ``adaptive`` method samples every point until its 95% confidence
+    interval is ``target`` wide on each side, spending at most ``budget``
+    trials, and returns the half widths as a fourth array.
+    """
+    sizes = np.asarray(sizes)
+    if method == 'adaptive':
+        points = [((s, s), p) for p in prob_points for s in sizes]
+        stats = run_adaptive(leak_stats, points, target, budget,
+                             n_workers=n_workers, seed=seed, bernoulli=True)
+        shape = (*prob_points.shape, *sizes.shape)
+        Z = np.reshape([s.mean for s in stats], shape)
+        E = np.reshape([agresti_coull_half_width(s) for s in stats], shape)
+        X, Y = np.meshgrid(sizes, prob_points)
+        return X, Y, Z, E
+    if method == 'newman_ziff':
+        work = [((s, s), None, int(np.sum(n_tests))) for s in sizes]
+        sweeps = run_sweep(newman_ziff_sweep, work, n_workers, seed)
+        Z = np.stack([sweep.at(prob_points)['spanning']
+                      for sweep in sweeps], axis=1)
+    else:
+        work = [((s, s), p, n) for s in sizes
+                for p, n in zip(prob_points, n_tests)]
+        leaks = run_sweep(leak_count, work, n_workers, seed)
+        leaks = np.reshape(leaks, (*sizes.shape, *prob_points.shape)).T
+        Z = leaks / n_tests[:, np.newaxis]
+
+    X, Y = np.meshgrid(sizes, prob_points)
+    return X, Y, Z
+
+
+def cluster_size_distribution(size: Tuple[int, int], prob: float, n_grids: int,
+                              n_workers: int=N_WORKERS, store: str=None,
+                              seed: int=None) -> Data:
+    """Share of clusters of every size; a ``store`` makes the run resumable."""
+    item = (size, prob, n_grids)
+    if store is None:
+        histogram, = run_sweep(size_histogram, [item], n_workers, seed)
+    else:
+        store = ResultStore(store, {'plot': 'Cluster_sizes', 'size': size,
+                                    'prob': prob, 'seed': seed})
+        arrays, done = run_stored(size_histogram, item, store, n_workers, seed)
+        histogram = SizeHistogram.from_arrays(arrays, done)
+    data = histogram.counts
+    count = histogram.n_clusters
+
+    X = np.arange(1, data.shape[0])
+    Y = data[1:] / count
+    return X, Y
+
+
+def average_size(size: Tuple[int, int], prob_points: np.ndarray, n_grids: int,
+                 n_workers: int=N_WORKERS, method: str='sampling',
+                 seed: int=None, target: float=None) -> Data:
+    """Mean size of the cluster of a random node for every probability.
+
+    The ``adaptive`` method spends at most ``n_grids`` grids per point on
+    average, stops a point once its 95% confidence interval is within
+    ``target`` of the mean, and returns the half widths as a third array.
+    """
+    if method == 'adaptive':
+        points = [(size, p) for p in prob_points]
+        stats = run_adaptive(mean_size_stats, points, target, n_grids*len(points),
+                             relative=True, n_workers=n_workers, seed=seed)
+        data = np.array([s.mean for s in stats])
+        return prob_points, data, np.array([s.half_width() for s in stats])
+    if method == 'newman_ziff':
+        work = [(size, None, n_grids)]
+        sweep, = run_sweep(newman_ziff_sweep, work, n_workers, seed)
+        data = sweep.at(prob_points)['mean_size']
+    else:
+        sizes_squere = np.arange(size[0]*size[1]+1)**2
+        work = [(size, p, n_grids) for p in prob_points]
+        histograms = run_sweep(size_histogram, work, n_workers, seed)
+        distribution = np.stack([h.distribution() for h in histograms])
+        data = np.sum(sizes_squere * distribution, axis=1)
+    return prob_points, data
+
+
+def distribution_per_prob(size: Tuple[int, int], prob_points: np.ndarray, n_grids: int,
+                          n_workers: int=N_WORKERS, seed: int=None) -> Data:
+    """Clusters of every size per node, one row for every probability."""
+    work = [(size, p, n_grids) for p in prob_points]
+    histograms = run_sweep(size_histogram, work, n_workers, seed)
+    Z = np.stack([h.distribution()[1:] for h in histograms])
+    X, Y = np.meshgrid(np.arange(Z.shape[1]), prob_points)
+    return X, Y, Z
+
+
+def area_near_threshold(size: Tuple[int, int], eps: np.ndarray, n_points: int,
+                        seed: Seed=None) -> Data:
+    """Mean cluster area against the width of a neighbourhood of p = 0.5."""
+    grid = Grid(*size,
+                find_all_clusters=True,
+                update_on_init=False,
+                update_on_changes=True,
+                seed=seed)
+    prob_points = np.linspace(0.5-eps, 0.5+eps, n_points, axis=-1)
+    data_mean = np.full(prob_points.shape, 0.0)
+
+    for index, prob in tqdm(np.ndenumerate(prob_points), total=prob_points.size):
+        grid.change_probability(prob)
+        data_mean[index] = np.mean(grid.cluster_stats()['size'][1:])
+    return eps, np.mean(data_mean, axis=1)
+
+
+def area_per_prob(size: Tuple[int, int], prob_points: np.ndarray, n_grids: int,
+                  seed: Seed=None) -> Data:
+    """Mean cluster area for every probability, sampled in batches of grids."""
+    rng = np.random.default_rng(seed)
+    data_mean = np.full((*prob_points.shape, n_grids), 0.0)
+
+    for index, prob in tqdm(np.ndenumerate(prob_points), total=len(prob_points)):
+        start = 0
+        for n in batch_sizes(n_grids, *size):
+            batch = GridBatch(n, *size, prob, rng)
+            data_mean[index, start:start+n] = batch.n_nodes / batch.n_clusters()
+            start += n
+    return prob_points, np.mean(data_mean, axis=-1)
+
+
+def threshold_per_size(sizes: Sequence[int], n_samples: int, guess: float=PROBABILITY,
+                       n_workers: int=N_WORKERS, seed: int=None) -> Data:
+    """Median spanning threshold of square lattices and its 95% bounds, per size."""
+    work = [((s, s), guess, n_samples) for s in sizes]
+    samples = run_sweep(threshold_samples, work, n_workers, seed)
+    estimates = np.array([sample.estimate() for sample in samples])
+    return (np.asarray(sizes, float), *estimates.T)
+
+
+def threshold_fit(data: Data, nu: float=NU) -> dict:
+    """Finite size scaling fit of the ``threshold_per_size`` data, ``nu=None`` fits it too."""
+    sizes, thresholds, low, high = data
+    return fss_fit(sizes, thresholds, np.maximum((high - low) / 2, 1e-6), nu)
@@ -1,50 +1,154 @@
-from math import ceil
+from typing import Dict, Tuple
 
 import numpy as np
 from PIL import Image as im
 
-from grid import Grid
+from grid import Grid, Seed
 from settings import *
 
+Stamps = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
 
 class Drawer:
+    """Renders a grid tile by tile and keeps the result between calls.
+
+    The image is kept as a mask plane (which pixels the points and links
+    cover) and a surface of palette indices, one byte per pixel, that
+    becomes a ``P`` mode image. The colour of a cluster is a hash of its
+    smallest flat node index rather than of its label, as labels are
+    renumbered on every change; a cluster only changes colour when it
+    merges with one that starts at a smaller node.
+    Only tiles whose links changed get a new mask and only tiles whose
+    colours changed are recomposed. The versions of the grid tell which
+    of these are stale, so drawing an unchanged grid returns the kept
+    image as it is.
+    """
 
-    def __init__(self, grid: Grid) -> None:
+    def __init__(self, grid: Grid, seed: Seed=None) -> None:
         self.grid = grid
-        self.create_palette()
+        self.rng = np.random.default_rng(seed)
+        self.palette = create_palette(self.rng)
 
         self.line_lenght = None
         self.line_width = None
         self.point_diameter = None
-        
+
         self.width, self.height = None, None
         self.size = self.width, self.height
 
-        self.background = BACKGROUND_COLOR
-    
+        self.window = None
+        self.view = None
+        self.nodes = None
+
+        self.tile_size = TILE_SIZE
+        self.stamps: Dict[Tuple[int, int, int], Stamps] = dict()
+        self.colors = None
+        self.colors_key = None
+        self.forget_image()
+
     def set_properties(self, line_lenght, line_width, point_diameter) -> None:
         self.line_lenght = line_lenght
         self.line_width = line_width
         self.point_diameter = point_diameter
-        
-    def create_palette(self) -> None:
-        n_colors = len(self.grid.clusters_list)
-        self.palette = np.random.randint(0, 255, (n_colors+1, 3), np.uint8)
-        self.palette[0] = PASSIVE_COLOR
     
+    def set_window(self, window: Tuple[int, int, int, int]=None) -> None:
+        """Only draw nodes ``x0 <= x < x1``, ``y0 <= y < y1``; None draws all."""
+        self.window = window
+
+    def windowed(self, array: np.ndarray) -> np.ndarray:
+        x0, x1, y0, y1 = self.view
+        return array[x0:x1, y0:y1]
+    
+    def clip_window(self) -> None:
+        if self.window is None:
+            x0, x1, y0, y1 = 0, self.grid.width, 0, self.grid.height
+        else:
+            x0, x1, y0, y1 = self.window
+        x0, y0 = min(max(x0, 0), self.grid.width-1), min(max(y0, 0), self.grid.height-1)
+        x1, y1 = min(max(x1, x0+1), self.grid.width), min(max(y1, y0+1), self.grid.height)
+        self.view = x0, x1, y0, y1
+        self.nodes = x1 - x0, y1 - y0
+
+    def to_image(self, surface: np.ndarray) -> im.Image:
+        image = im.fromarray(surface.T)
+        image.putpalette(self.palette.tobytes())
+        return image
+
+    def forget_image(self) -> None:
+        self.image = None
+        self.image_key = None
+        self.overview = None
+        self.overview_key = None
+        self.drawn_links_version = None
+        self.drawn_labels_version = None
+        self.mask = None
+        self.surface = None
+        self.drawn_colors = None
+        self.drawn_horizontal = None
+        self.drawn_vertical = None
+
     def compute_image(self) -> im.Image:
+        self.clip_window()
         self.calculate_size()
-        self.compute_colors()
-        surface = np.tile(self.background, (self.width, self.height, 1)).astype(np.uint8)
-        if self.point_diameter:
-            self.draw_points(surface)
-        if self.line_width:
-            self.draw_lines(surface, True)
-            self.draw_lines(surface, False)
-        surface = surface.transpose(1, 0, 2)
-        image = im.fromarray(surface)
-        return image
+        image_key = (self.grid.size, self.view, self.line_lenght,
+                     self.line_width, self.point_diameter)
+        if image_key != self.image_key:
+            self.forget_image()
+            self.image_key = image_key
+            self.mask = np.zeros(self.size, bool)
+            self.surface = np.zeros(self.size, np.uint8)
+            colors = self.cluster_colors()[self.windowed(self.grid.clusters)]
+            links_changed = colors_changed = np.ones(self.nodes, bool)
+        elif (self.drawn_links_version == self.grid.links_version
+              and self.drawn_labels_version == self.grid.labels_version):
+            return self.image
+        else:
+            links_changed, colors_changed, colors = self.changed_nodes()
+
+        for tile in self.tiles_of(links_changed):
+            self.render_tile(*tile)
+        for tile in self.tiles_of(links_changed | colors_changed):
+            self.compose_tile(*tile, colors)
+
+        self.drawn_colors = colors
+        self.drawn_horizontal = np.array(self.windowed(self.grid.horizontal_links), bool)
+        self.drawn_vertical = np.array(self.windowed(self.grid.vertical_links), bool)
+        self.drawn_links_version = self.grid.links_version
+        self.drawn_labels_version = self.grid.labels_version
+        self.image = self.to_image(self.surface)
+        return self.image
     
+    def compute_overview(self, block: int) -> im.Image:
+        """One pixel per ``block`` x ``block`` nodes of the window.
+
+        Each pixel takes the colour of the largest cluster in its block,
+        so big clusters stay visible when the lattice is zoomed out.
+        """
+        self.clip_window()
+        overview_key = (self.grid.size, self.view, block, self.grid.labels_version)
+        if overview_key == self.overview_key:
+            return self.overview
+        labels = self.windowed(self.grid.clusters)
+        width, height = -(-labels.shape[0] // block), -(-labels.shape[1] // block)
+        padded = np.zeros((width*block, height*block), labels.dtype)
+        padded[:labels.shape[0], :labels.shape[1]] = labels
+        blocks = padded.reshape(width, block, height, block).transpose(0, 2, 1, 3)
+        blocks = blocks.reshape(width, height, block*block)
+        sizes = self.grid.cluster_stats()['size']
+        largest = np.take_along_axis(blocks, np.argmax(sizes[blocks], axis=-1)[..., np.newaxis], -1)
+        self.overview_key = overview_key
+        self.overview = self.to_image(self.cluster_colors()[largest[..., 0]])
+        return self.overview
+
+    def cluster_colors(self) -> np.ndarray:
+        """Palette index of every label of the grid, kept until the labels change."""
+        colors_key = (self.grid.size, self.grid.labels_version)
+        if colors_key != self.colors_key:
+            self.colors = color_indices(first_nodes(self.grid.clusters, self.grid.n_clusters))
+            self.colors[0] = PASSIVE_INDEX
+            self.colors_key = colors_key
+        return self.colors
+
     def calculate_size(self) -> tuple[int, int]:
         self.offset = max(self.line_width, self.point_diameter)
         self.offset_lt = self.offset // 2
@@ -53,66 +157,143 @@ class Drawer:
         if self.offset > self.line_lenght:
             raise NotImplementedError(f"Cant draw image with overlaps!")
 
-        self.width = (self.grid.width-1) * self.line_lenght + self.offset
-        self.height = (self.grid.height-1) * self.line_lenght + self.offset
+        nodes_x, nodes_y = self.nodes
+        self.width = (nodes_x-1) * self.line_lenght + self.offset
+        self.height = (nodes_y-1) * self.line_lenght + self.offset
         self.size = self.width, self.height
 
-    def compute_colors(self) -> None:
-        color_surface = np.tile(self.grid.clusters, (3, 1, 1)).transpose(1, 2, 0)
-        for z in range(3):
-            color_surface[..., z] = self.palette[color_surface[..., z], z]
-        color_surface = color_surface.repeat(self.line_lenght, axis=0)\
-            .repeat(self.line_lenght, axis=1)
-        
-        gap = self.line_lenght - self.offset
-        if gap:
-            color_surface = color_surface[:-gap, :-gap]
-        
-        self.color_surface = color_surface
-
-    def draw_points(self, surface) -> None:
-        circle = compute_circle(self.point_diameter)
-        gap = self.line_lenght - self.point_diameter
-        padded_circle = np.pad(circle, ((0, gap), (0, gap)))
-        circle_mask = np.tile(padded_circle, (3, self.grid.width, self.grid.height))\
-            .transpose(1, 2, 0)
-        if gap:
-            circle_mask = circle_mask[:-gap, :-gap]
-
-        offset_lt = self.offset_lt - self.point_diameter // 2
-        offset_rb = self.offset_rb - ceil(self.point_diameter / 2)
-        padded_mask = np.pad(circle_mask, ((offset_lt, offset_rb),
-                                            (offset_lt, offset_rb),
-                                            (0, 0)))
-
-        blit(surface, self.color_surface, padded_mask)
-        
-    def draw_lines(self, surface, is_horisontal: bool) -> None:
-        if is_horisontal:
-            target = self.grid.horizontal_links
+    def changed_nodes(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Nodes whose pixels depend on links or colours that changed.
+
+        A link also draws into the block of the next node, so changes
+        are spread one node right (horizontal) or down (vertical). Links
+        or labels whose version did not change are not compared at all.
+        The colour indices of the window are returned too.
+        """
+        if self.drawn_links_version == self.grid.links_version:
+            links_changed = np.zeros(self.nodes, bool)
+        else:
+            horizontal = self.drawn_horizontal != np.asarray(self.windowed(self.grid.horizontal_links), bool)
+            vertical = self.drawn_vertical != np.asarray(self.windowed(self.grid.vertical_links), bool)
+            links_changed = horizontal | vertical
+            links_changed[1:, :] |= horizontal[:-1, :]
+            links_changed[:, 1:] |= vertical[:, :-1]
+        if self.drawn_labels_version == self.grid.labels_version:
+            colors = self.drawn_colors
+            colors_changed = np.zeros(self.nodes, bool)
         else:
-            target = self.grid.vertical_links.T
-        gap = self.line_lenght - self.line_width
-        lines = target.repeat(self.line_lenght, axis=0)\
-            .repeat(self.line_lenght, axis=1)[:-self.line_lenght]
-        line_mask = np.concatenate((np.ones((lines.shape[0], self.line_width)),
-                                    np.zeros((lines.shape[0], gap))), axis=1)
-        lines_mask = np.tile(line_mask, (1, target.shape[1]))
-        masked_lines = lines * lines_mask
-        if gap:
-            masked_lines = masked_lines[:, :-gap]
-
-        offset_t = self.offset_lt - self.line_width // 2
-        offset_b = self.offset_rb - ceil(self.line_width / 2)
-        padded_mask = np.pad(masked_lines, ((self.offset_lt, self.offset_rb),
-                                            (offset_t, offset_b)))
-        if not is_horisontal:
-            padded_mask = padded_mask.T
-
-        epanded_mask = np.tile(padded_mask, (3, 1, 1)).transpose(1, 2, 0)
-        
-        blit(surface, self.color_surface, epanded_mask)
+            colors = self.cluster_colors()[self.windowed(self.grid.clusters)]
+            colors_changed = self.drawn_colors != colors
+        return links_changed, colors_changed, colors
+
+    def tiles_of(self, changed: np.ndarray) -> list:
+        step = self.tile_size
+        if not changed.any():
+            return []
+        starts_x = np.arange(0, changed.shape[0], step)
+        starts_y = np.arange(0, changed.shape[1], step)
+        dirty = np.logical_or.reduceat(changed, starts_x, axis=0)
+        dirty = np.logical_or.reduceat(dirty, starts_y, axis=1)
+        return [(starts_x[i], starts_y[j]) for i, j in zip(*np.nonzero(dirty))]
+
+    def tile_region(self, x0: int, y0: int) -> Tuple[slice, slice]:
+        length, step = self.line_lenght, self.tile_size
+        return (slice(x0*length, min((x0+step)*length, self.width)),
+                slice(y0*length, min((y0+step)*length, self.height)))
+
+    def get_stamps(self) -> Stamps:
+        key = (self.line_lenght, self.line_width, self.point_diameter)
+        if key not in self.stamps:
+            self.stamps[key] = compute_stamps(*key, self.offset_lt)
+        return self.stamps[key]
+
+    def render_tile(self, x0: int, y0: int) -> None:
+        region_x, region_y = self.tile_region(x0, y0)
+        x1, y1 = x0 + self.tile_size, y0 + self.tile_size
+        length = self.line_lenght
+        point, horizontal, vertical = self.get_stamps()
+        nodes_x, nodes_y = self.nodes
+        mask = np.tile(point, (min(x1, nodes_x)-x0, min(y1, nodes_y)-y0))
+
+        if self.line_width:
+            hx0, vy0 = max(x0-1, 0), max(y0-1, 0)
+            links = np.asarray(self.windowed(self.grid.horizontal_links)[hx0:x1, y0:y1], bool)
+            paste(mask, np.kron(links, horizontal),
+                  hx0*length + self.offset_lt - x0*length, 0)
+            links = np.asarray(self.windowed(self.grid.vertical_links)[x0:x1, vy0:y1], bool)
+            paste(mask, np.kron(links, vertical),
+                  0, vy0*length + self.offset_lt - y0*length)
+
+        shape = (region_x.stop - region_x.start, region_y.stop - region_y.start)
+        self.mask[region_x, region_y] = mask[:shape[0], :shape[1]]
+
+    def compose_tile(self, x0: int, y0: int, colors: np.ndarray) -> None:
+        region_x, region_y = self.tile_region(x0, y0)
+        x1, y1 = x0 + self.tile_size, y0 + self.tile_size
+        mask = self.mask[region_x, region_y]
+        colors = upscale(colors[x0:x1, y0:y1], self.line_lenght)
+        colors = colors[:mask.shape[0], :mask.shape[1]]
+        np.multiply(colors, mask, out=self.surface[region_x, region_y])
+
+
+BACKGROUND_INDEX = 0
+PASSIVE_INDEX = 1
+N_CLUSTER_COLORS = 254
+HASH_MULTIPLIER = np.uint64(2654435761)
+
+
+def create_palette(rng: np.random.Generator) -> np.ndarray:
+    """256 colours: the background, nodes out of clusters and the cluster colours."""
+    palette = rng.integers(0, 255, (N_CLUSTER_COLORS+2, 3), np.uint8)
+    palette[BACKGROUND_INDEX] = BACKGROUND_COLOR
+    palette[PASSIVE_INDEX] = PASSIVE_COLOR
+    return palette
+
+
+def first_nodes(labels: np.ndarray, n_clusters: int) -> np.ndarray:
+    """Smallest flat node index of every label, an id that survives relabeling."""
+    first = np.full(n_clusters+1, labels.size, np.int64)
+    np.minimum.at(first, labels.ravel(), np.arange(labels.size))
+    return first
+
+
+def color_indices(ids: np.ndarray) -> np.ndarray:
+    """Cluster colour of every id, a multiplicative hash of the id."""
+    hashed = (ids.astype(np.uint64) * HASH_MULTIPLIER) >> np.uint64(16)
+    return (hashed % np.uint64(N_CLUSTER_COLORS) + 2).astype(np.uint8)
+
+
+def upscale(indices: np.ndarray, length: int) -> np.ndarray:
+    """Every index as a ``length`` x ``length`` block, by a nearest neighbour resize."""
+    width, height = indices.shape
+    image = im.fromarray(indices).resize((height*length, width*length), im.NEAREST)
+    return np.asarray(image)
+
+
+def compute_stamps(line_lenght: int, line_width: int, point_diameter: int,
+                   offset_lt: int) -> Stamps:
+    """Per-node masks of the point, horizontal and vertical line."""
+    point = np.zeros((line_lenght, line_lenght), bool)
+    if point_diameter:
+        start = offset_lt - point_diameter // 2
+        circle = compute_circle(point_diameter) >= 0.5
+        point[start:start+point_diameter, start:start+point_diameter] = circle
+
+    horizontal = np.zeros((line_lenght, line_lenght), bool)
+    start = offset_lt - line_width // 2
+    horizontal[:, start:start+line_width] = True
+    return point, horizontal, horizontal.T.copy()
+
 
+def paste(target: np.ndarray, mask: np.ndarray, x: int, y: int) -> None:
+    """Raise ``target`` to ``mask`` placed at ``(x, y)``, clipped to its bounds."""
+    x0, y0 = max(x, 0), max(y, 0)
+    x1 = min(x + mask.shape[0], target.shape[0])
+    y1 = min(y + mask.shape[1], target.shape[1])
+    if x0 >= x1 or y0 >= y1:
+        return
+    window = target[x0:x1, y0:y1]
+    np.maximum(window, mask[x0-x:x1-x, y0-y:y1-y], out=window)
 
 
 def compute_circle(diameter: int) -> np.ndarray:
@@ -134,11 +315,7 @@ def compute_circle(diameter: int) -> np.ndarray:
             image[x, y] = cell.mean()
     return image
 
-def blit(surface: np.ndarray, image: np.ndarray, mask: np.ndarray) -> None:
-    surface[...] = surface * (1-mask)
-    surface[...] = surface + image * mask
 
-        
 if __name__ == '__main__':
     d = Drawer(Grid())
-    d.compute_image().show()
\ No newline at end of file
+    d.compute_image().show()
@@ -1,65 +1,237 @@
+import operator
 import warnings
-from functools import cached_property, reduce
-from itertools import product
 from math import pi, sqrt
-from typing import List, Set, Tuple
+from operator import attrgetter
+from typing import Sequence, Set, Tuple, Union
 
 import numpy as np
 
+from histogram import size_counts
+from labeling import LABELERS, bond_endpoints, merge_labels
+from lattice_file import read_lattice, write_lattice
+from links import PackedLinks, random_links
 from settings import *
+from spanning import HORIZONTAL, spanning_labels, spans
+
+Seed = Union[None, int, np.random.SeedSequence, np.random.BitGenerator, np.random.Generator]
 
 
 class Cluster:
-    def __init__(self, name: int, nodes: set) -> None:
+    """A view of one cluster over the label array of its grid.
+
+    Statistics are a row of the cluster table of the grid, which is
+    computed for all clusters at once, and node coordinates are only
+    built when asked for.
+    """
+    __slots__ = ('grid', 'name')
+
+    def __init__(self, grid: 'Grid', name: int) -> None:
+        self.grid = grid
         self.name = name
-        self.nodes = nodes
 
-    @cached_property
+    @property
+    def nodes(self) -> Set[Tuple[int, int]]:
+        xs, ys = self.coordinates
+        return set(zip(xs.tolist(), ys.tolist()))
+
+    @property
+    def coordinates(self) -> Tuple[np.ndarray, np.ndarray]:
+        return np.nonzero(self.grid.clusters == self.name)
+
+    @property
+    def stats(self) -> np.void:
+        return self.grid.cluster_stats()[self.name]
+
+    @property
     def center_of_mass(self) -> Tuple[float, float]:
-        x, y = reduce(lambda x, y: (x[0]+y[0], x[1]+y[1]), self.nodes)
-        x, y = x/self.size, y/self.size
-        return x, y
+        x, y = self.stats['center_of_mass']
+        return float(x), float(y)
+
+    @property
+    def radius_of_gyration(self) -> float:
+        return float(self.stats['radius_of_gyration'])
+
+    @property
+    def bounding_box(self) -> Tuple[int, int, int, int]:
+        """``(x0, y0, x1, y1)`` of the cluster, both corners included."""
+        return tuple(self.stats['bounding_box'].tolist())
+
+    @property
+    def touches(self) -> Set[str]:
+        """Edges of the grid the cluster reaches."""
+        return {edge for edge, touched in zip(EDGES, self.stats['touches']) if touched}
     
-    @cached_property
+    @property
     def radius(self) -> float:
         return sqrt(self.area / pi)
 
-    @cached_property
+    @property
     def area(self) -> int:
         return self.size
 
-    @cached_property
+    @property
     def size(self) -> int:
-        return len(self.nodes)
+        return int(self.stats['size'])
+
+
+class Cluster_list(Sequence):
+    """Clusters of a grid indexed by label, with ``None`` for label 0."""
+
+    def __init__(self, grid: 'Grid') -> None:
+        self.grid = grid
+
+    def __len__(self) -> int:
+        return self.grid.n_clusters + 1
+
+    def __getitem__(self, index: int|slice) -> Cluster:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = operator.index(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Cluster label out of range")
+        return Cluster(self.grid, index) if index else None
+
+
+EDGES = ('left', 'right', 'top', 'bottom')
+CLUSTER_DTYPE = np.dtype([('size', np.int64),
+                          ('center_of_mass', float, 2),
+                          ('radius_of_gyration', float),
+                          ('bounding_box', np.int64, 4),
+                          ('touches', bool, len(EDGES))])
+
+
+def cluster_table(labels: np.ndarray, n_clusters: int) -> np.ndarray:
+    """Statistics of every cluster as a structured array indexed by label.
+
+    Row 0 stands for the unlabeled nodes and is left empty.
+    """
+    width, height = labels.shape
+    flat_labels = labels.ravel().astype(np.intp)
+    xs = np.repeat(np.arange(width), height)
+    ys = np.tile(np.arange(height), width)
+
+    def total(weights: np.ndarray=None) -> np.ndarray:
+        return np.bincount(flat_labels, weights, minlength=n_clusters+1)
+
+    table = np.zeros(n_clusters+1, CLUSTER_DTYPE)
+    table['size'] = total()
+    count = np.maximum(table['size'], 1)
+    center_x, center_y = total(xs) / count, total(ys) / count
+    table['center_of_mass'] = np.stack((center_x, center_y), axis=1)
+    spread = total(xs**2 + ys**2) / count - center_x**2 - center_y**2
+    table['radius_of_gyration'] = np.sqrt(np.maximum(spread, 0))
+
+    box = np.empty((n_clusters+1, 4), np.int64)
+    box[:, :2] = (width, height)
+    box[:, 2:] = -1
+    np.minimum.at(box[:, 0], flat_labels, xs)
+    np.minimum.at(box[:, 1], flat_labels, ys)
+    np.maximum.at(box[:, 2], flat_labels, xs)
+    np.maximum.at(box[:, 3], flat_labels, ys)
+    box[0] = 0
+    table['bounding_box'] = box
+    table['touches'] = np.stack((box[:, 0] == 0, box[:, 2] == width-1,
+                                 box[:, 1] == 0, box[:, 3] == height-1), axis=1)
+    table['touches'][0] = False
+    return table
+
 
 class Grid:
 
     def __init__(self, width: int=WIDTH, height: int=HEIGHT, 
                  prob: float=PROBABILITY, find_all_clusters=True,
-                 update_on_changes=True, update_on_init=True) -> None:
+                 update_on_changes=True, update_on_init=True,
+                 labeler: str=LABELER, coupled: bool=False, 
+                 packed: bool=False, seed: Seed=None) -> None:
         self.size = self.width, self.height = width, height
         self.prob = prob
         self.find_all_clusters = find_all_clusters
+        self.labeler = labeler
         self.update_on_changes = update_on_changes
+        self.coupled = coupled
+        self.packed = packed
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        # Only the links of the first flood can be drawn again from the seed
+        self.n_floods = 0
 
         self.horizontal_links = np.zeros(self.size, bool)
         self.vertical_links = np.zeros(self.size, bool)
+        self.horizontal_field = None
+        self.vertical_field = None
 
         self.clusters = np.zeros(self.size, np.uint32)
-        self.clusters_list = [None, ]
+        self.clusters_list = Cluster_list(self)
+        self.n_clusters = 0
+        self.stats = None
+
+        # Bumped on every change, so views can tell whether what they
+        # derived from the grid is stale.
+        self.links_version = 0
+        self.labels_version = 0
+        self.labeled_links_version = None
+        self.stats_version = None
+        self.leaks = dict()
 
         if update_on_init:
             self.update()
     
     def flood(self) -> None:
-        self.horizontal_links = np.random.binomial(1, self.prob, self.size)
-        self.vertical_links = np.random.binomial(1, self.prob, self.size)
-        self.horizontal_links[-1, :] = False
-        self.vertical_links[:, -1] = False
+        self.n_floods += 1
+        if self.coupled:
+            self.horizontal_field = self.rng.random(self.size, np.float32)
+            self.vertical_field = self.rng.random(self.size, np.float32)
+            self.open_links()
+            return
+        self.horizontal_links = random_links(self.rng, self.size, self.prob, 0, self.packed)
+        self.vertical_links = random_links(self.rng, self.size, self.prob, 1, self.packed)
+        self.links_changed(from_seed=True)
+    
+    def open_links(self) -> None:
+        horizontal = self.horizontal_field < self.prob
+        vertical = self.vertical_field < self.prob
+        horizontal[-1, :] = False
+        vertical[:, -1] = False
+        self.set_links(horizontal, vertical, from_seed=True)
+    
+    def set_links(self, horizontal: np.ndarray|PackedLinks,
+                  vertical: np.ndarray|PackedLinks, from_seed: bool=False) -> None:
+        if self.packed and not isinstance(horizontal, PackedLinks):
+            horizontal = PackedLinks.pack(horizontal)
+            vertical = PackedLinks.pack(vertical)
+        self.horizontal_links = horizontal
+        self.vertical_links = vertical
+        self.links_changed(from_seed)
+    
+    def links_changed(self, from_seed: bool=False) -> None:
+        """Call after changing the link arrays in place.
+
+        Links not drawn from the seed of the grid can no longer be drawn
+        again from it, so the seed is dropped unless ``from_seed``.
+        """
+        self.links_version += 1
+        self.leaks = dict()
+        if not from_seed:
+            self.seed = None
+    
+    def labels_changed(self) -> None:
+        self.labels_version += 1
+        self.stats = None
+    
+    def labels_current(self) -> bool:
+        return bool(self.n_clusters) and self.labeled_links_version == self.links_version
+    
+    def has_fields(self) -> bool:
+        return (self.horizontal_field is not None 
+                and self.horizontal_field.shape == self.size)
 
     def forget_clusters(self) -> None:
         self.clusters = np.zeros(self.size, np.uint32)
-        self.clusters_list = [None, ]
+        self.n_clusters = 0
+        self.labeled_links_version = None
+        self.labels_changed()
     
     def update(self) -> None:
         self.flood()
@@ -77,76 +249,78 @@ class Grid:
             self.update()
     
     def change_probability(self, prob: float) -> None:
-        self.prob = prob
-        if self.update_on_changes:
+        old_prob, self.prob = self.prob, prob
+        if not self.update_on_changes:
+            return
+        if not (self.coupled and self.has_fields()):
             self.update()
+        elif prob > old_prob and self.labels_current():
+            self.open_bonds(old_prob)
+        else:
+            self.open_links()
+            self.forget_clusters()
+            if self.find_all_clusters:
+                self.find_clusters()
+    
+    def open_bonds(self, old_prob: float) -> None:
+        """Open the bonds with ``old_prob <= u < prob`` and merge their clusters."""
+        opened_horizontal = ((old_prob <= self.horizontal_field) 
+                             & (self.horizontal_field < self.prob))
+        opened_vertical = ((old_prob <= self.vertical_field) 
+                           & (self.vertical_field < self.prob))
+        opened_horizontal[-1, :] = False
+        opened_vertical[:, -1] = False
+        self.set_links(np.asarray(self.horizontal_links) | opened_horizontal,
+                       np.asarray(self.vertical_links) | opened_vertical, from_seed=True)
+
+        u, v = bond_endpoints(opened_horizontal, opened_vertical)
+        self.clusters, self.n_clusters = merge_labels(self.clusters, self.n_clusters, u, v)
+        self.labeled_links_version = self.links_version
+        self.labels_changed()
+    
+    def is_leaks(self, direction: str=HORIZONTAL) -> bool:
+        """Whether the grid leaks in ``direction``, remembered until the links change."""
+        if direction not in self.leaks:
+            if self.labels_current():
+                leaks = len(spanning_labels(self.clusters, direction)) > 0
+            else:
+                leaks = spans(self.horizontal_links, self.vertical_links, direction)
+            self.leaks[direction] = leaks
+        return self.leaks[direction]
+    
+    def spanning_cluster(self, direction: str=HORIZONTAL) -> Cluster:
+        self.update_clusters()
+        labels = spanning_labels(self.clusters, direction)
+        if not len(labels):
+            return None
+        return max((self.clusters_list[i] for i in labels), 
+                   key=attrgetter('size'))
+
+    def find_clusters(self) -> None:
+        labeler = LABELERS[self.labeler]
+        self.clusters, self.n_clusters = labeler(self.horizontal_links, 
+                                                 self.vertical_links)
+        self.labeled_links_version = self.links_version
+        self.labels_changed()
+    
+    def update_clusters(self) -> None:
+        """Label the grid unless the labels already match the links."""
+        if not self.labels_current():
+            self.find_clusters()
     
-    def is_leaks(self) -> bool:
-        on_left_border = product((0, ), range(self.height))
-        to_visit = set(on_left_border)
-        
-        while to_visit:
-            leaks, nodes = self.is_cluster_leaks(to_visit.pop())
-            if leaks:
-                return True
-            to_visit.difference_update(nodes)
-        return False
-    
-    def is_cluster_leaks(self, start: Tuple[int, int]) -> Tuple[bool, set]:
-        visited = set((start, ))
-        backtrack = [start, ]
-        while backtrack:
-            x, y = backtrack.pop()
-            connected = self.find_connected(x, y)
-            if not connected:
-                continue
-            if connected[-1][0] == self.width-1:
-                visited.add(connected[-1])
-                return True, visited
-            for node in connected:
-                if node not in visited:
-                    visited.add(node)
-                    backtrack.append(node)
-        return False, visited
-
-    def find_connected(self, x: int, y: int) -> List[Tuple[int, int]]:
-        connected = list()
-        # Left
-        if self.horizontal_links[x-1, y]:
-            connected.append((x-1, y))
-        # Bottom
-        if self.vertical_links[x, y]:
-            connected.append((x, y+1))
-        # Top
-        if self.vertical_links[x, y-1]:
-            connected.append((x, y-1))
-        # Right
-        if self.horizontal_links[x, y]:
-            connected.append((x+1, y))
-
-        return connected
-    
-    def DFS(self, start: Tuple[int, int]) -> Set[Tuple[int, int]]:
-        visited = set((start, ))
-        backtrack = [start, ]
-        while backtrack:
-            x, y = backtrack.pop()
-            for node in self.find_connected(x, y):
-                if node not in visited:
-                    visited.add(node)
-                    backtrack.append(node)
-        return visited
-    
-    def find_clusters(self):
-        to_visit = set(product(range(self.width), range(self.height)))  
-        
-        while to_visit:
-            nodes = self.DFS(to_visit.pop())
-            to_visit.difference_update(nodes)
-            cluster = Cluster(len(self.clusters_list), nodes)
-            self.clusters_list.append(cluster)
-            for x, y in nodes:
-                self.clusters[x, y] = cluster.name
+    def cluster_stats(self) -> np.ndarray:
+        """The ``cluster_table`` of the grid, built once per labeling."""
+        self.update_clusters()
+        if self.stats is None or self.stats_version != self.labels_version:
+            self.stats = cluster_table(self.clusters, self.n_clusters)
+            self.stats_version = self.labels_version
+        return self.stats
+    
+    def cluster_size_histogram(self) -> np.ndarray:
+        self.update_clusters()
+        if self.stats is not None and self.stats_version == self.labels_version:
+            return np.bincount(self.stats['size'][1:], minlength=self.width*self.height+1)
+        return size_counts(self.clusters, self.width*self.height)
     
     def get_cluster_on(self, x: int, y: int) -> Cluster:
         return self.clusters_list[self.clusters[x, y]]
@@ -156,53 +330,70 @@ class Grid:
         print(self.to_text().translate(symbols))
     
     def to_text(self) -> str:
-        rows_list = []
-        for y in range(self.height):
-            rows_list.append([])
-            for x in range(self.width):
-                i = self.horizontal_links[x, y] + self.vertical_links[x, y]*2
-                rows_list[-1].append(str(i))
-            rows_list[-1] = ''.join(rows_list[-1])
-        text = '\n'.join(rows_list)
-        return text
+        codes = (np.asarray(self.horizontal_links, np.uint8) 
+                 + np.asarray(self.vertical_links, np.uint8)*2)
+        rows = np.full((self.height, self.width+1), ord('\n'), np.uint8)
+        rows[:, :-1] = codes.T + ord('0')
+        return rows.tobytes()[:-1].decode('ascii')
     
     @classmethod
     def from_text(cls, text: str) -> 'Grid':
-        w, h = text.find('\n'), text.count('\n')+1
+        rows = text.splitlines()
+        w, h = len(rows[0]), len(rows)
+        if any(len(row) != w for row in rows):
+            raise ValueError("All rows of a grid must have the same length")
+        codes = np.frombuffer(''.join(rows).encode('ascii'), np.uint8)
+        codes = codes.reshape(h, w).T - ord('0')
         grid = Grid(w, h, update_on_init=False)
-        for y, row in enumerate(text.splitlines()):
-            for x, cell in enumerate(row):
-                if cell in ('1', '3'):
-                    grid.horizontal_links[x, y] = True
-                if cell in ('2', '3'):
-                    grid.vertical_links[x, y] = True
-        if np.any(grid.horizontal_links[-1, ...]):
-            grid.horizontal_links[-1, ...] = 0
+        horizontal = (codes & 1).astype(bool)
+        vertical = (codes & 2).astype(bool)
+        if np.any(horizontal[-1, ...]):
+            horizontal[-1, ...] = 0
             warnings.warn("Nodes on right edge cant have horizontal link")
-        if np.any(grid.vertical_links[..., -1]):
-            grid.horizontal_links[..., -1] = 0
+        if np.any(vertical[..., -1]):
+            vertical[..., -1] = 0
             warnings.warn("Nodes on bottom edge cant have vertical link")
+        grid.set_links(horizontal, vertical)
+        return grid
+    
+    def to_file(self, path: str, seed: int=None) -> None:
+        """Save the links; ``seed`` defaults to the seed of the grid if it is an int.
+
+        The seed of the grid is only written while the links still come
+        from its first flood, later floods draw from the advanced stream.
+        """
+        if seed is None and isinstance(self.seed, int) and self.n_floods == 1:
+            seed = self.seed
+        write_lattice(path, self.horizontal_links, self.vertical_links, 
+                      self.prob, seed)
+    
+    @classmethod
+    def from_file(cls, path: str, packed: bool=False) -> 'Grid':
+        """Load a lattice file; ``packed`` keeps the links memory mapped."""
+        header, horizontal, vertical = read_lattice(path)
+        grid = Grid(*horizontal.shape, float(header['prob']), 
+                    update_on_init=False, packed=packed)
+        if packed:
+            grid.set_links(horizontal, vertical)
+        else:
+            grid.set_links(np.asarray(horizontal), np.asarray(vertical))
         return grid
 
 if __name__ == '__main__':
-    from perf_measurer import count_time
-    grid = Grid.from_text(open("test1.txt").read())
-    grid.print()
+    from time import perf_counter
+    Grid(20, 10).print()
     w, h = 1000, 1000
     grid = Grid(w, h, find_all_clusters=False, update_on_init=False)
 
-    with count_time() as timer:
-        grid.is_leaks()
-    print(f"Update without cluster finding:")
-    print(timer.elapsed)
-
-    with count_time() as timer:
-        grid.is_leaks()
-    print("Update and check leackage")
-    print(timer.elapsed)
-   
+    start = perf_counter()
     grid.update()
-    with count_time() as timer:
-        grid.find_clusters()
-    print("Update and find clusters")
-    print(timer.elapsed)
+    print(f"Update without cluster finding: {perf_counter() - start:.4f}s")
+
+    start = perf_counter()
+    grid.is_leaks()
+    print(f"Check leakage: {perf_counter() - start:.4f}s")
+
+    start = perf_counter()
+    grid.find_clusters()
+    print(f"Find clusters: {perf_counter() - start:.4f}s")
+    print("Run benchmark.py for the full suite")
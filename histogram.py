@@ -0,0 +1,61 @@
+from typing import Dict
+
+import numpy as np
+
+
+def size_counts(labels: np.ndarray, n_nodes: int) -> np.ndarray:
+    sizes = np.bincount(labels.ravel())[1:]
+    return np.bincount(sizes, minlength=n_nodes+1)
+
+
+class SizeHistogram:
+    """Running count of clusters of every size over many grids.
+
+    Only a ``counts`` vector of length ``n_nodes+1`` is kept, so it can
+    take any number of grids in constant memory. Histograms of the same
+    lattice size can be added together, e.g. when merging sweep pieces.
+    """
+
+    def __init__(self, n_nodes: int) -> None:
+        self.n_nodes = n_nodes
+        self.counts = np.zeros(n_nodes+1, np.int64)
+        self.n_grids = 0
+
+    def add_labels(self, labels: np.ndarray, n_grids: int=1) -> None:
+        self.counts += size_counts(labels, self.n_nodes)
+        self.n_grids += n_grids
+
+    def add_grid(self, grid) -> None:
+        self.counts += grid.cluster_size_histogram()
+        self.n_grids += 1
+
+    def add_batch(self, batch) -> None:
+        self.counts += batch.size_histogram()
+        self.n_grids += batch.n_grids
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {'counts': self.counts}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], n_grids: int) -> 'SizeHistogram':
+        histogram = cls(len(arrays['counts'])-1)
+        histogram.counts = arrays['counts'].astype(np.int64)
+        histogram.n_grids = n_grids
+        return histogram
+
+    @property
+    def n_clusters(self) -> int:
+        return int(np.sum(self.counts))
+
+    def distribution(self) -> np.ndarray:
+        """Clusters of every size per lattice node, averaged over grids."""
+        return self.counts / (self.n_nodes * max(self.n_grids, 1))
+
+    def __add__(self, other: 'SizeHistogram') -> 'SizeHistogram':
+        if other.n_nodes != self.n_nodes:
+            raise ValueError(f"Cant add histograms of {self.n_nodes} "
+                             f"and {other.n_nodes} nodes")
+        result = SizeHistogram(self.n_nodes)
+        result.counts = self.counts + other.counts
+        result.n_grids = self.n_grids + other.n_grids
+        return result
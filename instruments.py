@@ -15,6 +15,10 @@ class Instruments_panel(ttk.Frame):
         self.painter = painter
         self.grid = painter.grid
         self.cluster_count = None
+        self.width, self.height = self.grid.size
+        self.prob = self.grid.prob
+        self.regenerations = 0
+        self.regenerated = 0
 
         scales = ttk.Frame(self)
         scales.pack(pady=20, padx=20)
@@ -40,15 +44,15 @@ class Instruments_panel(ttk.Frame):
                   command=self.plot_clusters).pack(side=tk.LEFT, padx=10)
     
     def plot_clusters(self) -> None:
-        if self.cluster_count is None:
-            self.cluster_count = Cluster_count(self, self.grid)
+        if self.cluster_count is None or not self.cluster_count.winfo_exists():
+            self.cluster_count = Cluster_count(self, self.painter)
         else:
-            self.cluster_count.destroy()
-            self.cluster_count = Cluster_count(self, self.grid)
+            self.cluster_count.update()
+            self.cluster_count.lift()
     
     def update_grid(self) -> None:
-        self.grid.update()
-        self.on_grid_change()
+        self.regenerations += 1
+        self.request_grid()
     
     def update_line_width(self, value: int|float) -> None:
         self.painter.line_size = value
@@ -58,27 +62,42 @@ class Instruments_panel(ttk.Frame):
         self.painter.on_propery_change()
     
     def update_width(self, new_value: int) -> None:
-        self.grid.change_size(new_value, None)
-        self.on_grid_change()
+        self.width = new_value
+        self.request_grid()
     def update_height(self, new_value: int) -> None:
-        self.grid.change_size(None, new_value)
-        self.on_grid_change()
+        self.height = new_value
+        self.request_grid()
         
     def update_probability(self, new_value: int) -> None:
-        self.grid.change_probability(new_value)
-        self.on_grid_change()
+        self.prob = new_value
+        self.request_grid()
+    
+    def request_grid(self) -> None:
+        self.painter.request(sync=self.sync_grid, on_done=self.on_grid_change)
+
+    def sync_grid(self) -> None:
+        """Bring the grid to the values set on the panel; runs on the worker."""
+        regenerations = self.regenerations
+        if (self.width, self.height) != self.grid.size:
+            self.grid.prob = self.prob
+            self.grid.change_size(self.width, self.height)
+        elif regenerations != self.regenerated:
+            self.grid.prob = self.prob
+            self.grid.update()
+        elif self.prob != self.grid.prob:
+            self.grid.change_probability(self.prob)
+        self.regenerated = regenerations
     
     def on_grid_change(self) -> None:
-        if self.cluster_count is not None:
+        if self.cluster_count is not None and self.cluster_count.winfo_exists():
             self.cluster_count.update()
-        self.painter.on_grid_change()
 
 
 if __name__ == "__main__":
     root = tk.Tk()
     p = Painter(root)
     p.destroy()
-    p.update = lambda *args: None
+    p.request = lambda *args, **kwargs: None
     p.grid.update = lambda *args: None
     i = Instruments_panel(root, p)
     i.pack()
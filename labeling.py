@@ -0,0 +1,132 @@
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from links import PackedLinks
+
+
+def index_dtype(n_nodes: int) -> np.dtype:
+    """int32 node indices while they fit, 4 bytes per bond end and parent instead of 8."""
+    return np.dtype(np.int32 if n_nodes < 2**31 else np.int64)
+
+
+def flat_links(links: np.ndarray|PackedLinks) -> np.ndarray:
+    dtype = index_dtype(links.size)
+    if isinstance(links, PackedLinks):
+        return links.flatnonzero(dtype)
+    return np.flatnonzero(links).astype(dtype, copy=False)
+
+
+def bond_endpoints(horizontal_links: np.ndarray|PackedLinks,
+                   vertical_links: np.ndarray|PackedLinks) -> Tuple[np.ndarray, np.ndarray]:
+    height = horizontal_links.shape[-1]
+    horizontal = flat_links(horizontal_links)
+    vertical = flat_links(vertical_links)
+    u = np.concatenate((horizontal, vertical))
+    v = np.concatenate((horizontal + height, vertical + 1), dtype=u.dtype)
+    return u, v
+
+
+def compress(parent: np.ndarray) -> np.ndarray:
+    while True:
+        grandparent = parent[parent]
+        if np.array_equal(grandparent, parent):
+            return parent
+        parent = grandparent
+
+
+def connected_components(n_nodes: int, u: np.ndarray, v: np.ndarray,
+                         until: Callable[[np.ndarray], bool]=None) -> np.ndarray:
+    """Union-find over the edge list ``u``-``v`` done with whole-array hooking.
+
+    Every round each tree is hooked onto the smallest root it shares an
+    edge with and the forest is flattened by pointer jumping, so the
+    number of trees at least halves and O(log n) rounds are enough.
+    Returns for each node the smallest node of its component. ``until``
+    is checked after every round and stops the search early. Parents are
+    int32 while ``n_nodes < 2**31``, so a packed lattice costs about 4
+    bytes per node for ``parent`` and 8 per open bond for ``u`` and ``v``.
+    """
+    parent = np.arange(n_nodes, dtype=index_dtype(n_nodes))
+    while len(u):
+        pu, pv = parent[u], parent[v]
+        differ = pu != pv
+        u, v, pu, pv = u[differ], v[differ], pu[differ], pv[differ]
+        if not len(u):
+            break
+        np.minimum.at(parent, np.maximum(pu, pv), np.minimum(pu, pv))
+        parent = compress(parent)
+        if until is not None and until(parent):
+            break
+    return parent
+
+
+def relabel(roots: np.ndarray) -> Tuple[np.ndarray, int]:
+    flat_roots = roots.ravel()
+    is_root = flat_roots == np.arange(flat_roots.size)
+    names = np.cumsum(is_root, dtype=np.uint32)
+    labels = names[flat_roots].reshape(roots.shape)
+    return labels, int(names[-1]) if names.size else 0
+
+
+def merge_labels(labels: np.ndarray, n_clusters: int,
+                 u: np.ndarray, v: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Relabel ``labels`` after the bonds ``u``-``v`` were opened.
+
+    The union-find runs over cluster labels rather than nodes, so the
+    work is proportional to the number of new bonds plus one gather.
+    Merged clusters keep the smallest of their labels before labels are
+    compacted, which gives the same numbering as labeling from scratch.
+    """
+    flat_labels = labels.ravel()
+    dtype = index_dtype(n_clusters+1)
+    roots = connected_components(n_clusters+1, flat_labels[u].astype(dtype),
+                                 flat_labels[v].astype(dtype))
+    is_root = roots == np.arange(n_clusters+1)
+    names = np.cumsum(is_root, dtype=np.uint32) - 1
+    return names[roots][labels], int(names[-1])
+
+
+def union_find_labels(horizontal_links: np.ndarray,
+                      vertical_links: np.ndarray) -> Tuple[np.ndarray, int]:
+    u, v = bond_endpoints(horizontal_links, vertical_links)
+    roots = connected_components(horizontal_links.size, u, v)
+    return relabel(roots.reshape(horizontal_links.shape))
+
+
+def dfs_labels(horizontal_links: np.ndarray,
+               vertical_links: np.ndarray) -> Tuple[np.ndarray, int]:
+    horizontal_links = np.asarray(horizontal_links)
+    vertical_links = np.asarray(vertical_links)
+    width, height = horizontal_links.shape
+    labels = np.zeros((width, height), np.uint32)
+    n_clusters = 0
+    for x in range(width):
+        for y in range(height):
+            if labels[x, y]:
+                continue
+            n_clusters += 1
+            labels[x, y] = n_clusters
+            backtrack = [(x, y), ]
+            while backtrack:
+                i, j = backtrack.pop()
+                neighbours = []
+                if i > 0 and horizontal_links[i-1, j]:
+                    neighbours.append((i-1, j))
+                if i < width-1 and horizontal_links[i, j]:
+                    neighbours.append((i+1, j))
+                if j > 0 and vertical_links[i, j-1]:
+                    neighbours.append((i, j-1))
+                if j < height-1 and vertical_links[i, j]:
+                    neighbours.append((i, j+1))
+                for node in neighbours:
+                    if not labels[node]:
+                        labels[node] = n_clusters
+                        backtrack.append(node)
+    return labels, n_clusters
+
+
+LABELERS: Dict[str, Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, int]]] = {
+    'union_find': union_find_labels,
+    'dfs': dfs_labels,
+}
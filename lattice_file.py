@@ -0,0 +1,65 @@
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+from links import PackedLinks
+
+MAGIC = b'PERC'
+VERSION = 1
+HEADER_DTYPE = np.dtype([('magic', 'S4'), ('version', '<u4'),
+                         ('width', '<u4'), ('height', '<u4'),
+                         ('prob', '<f8'), ('seed', '<i8')])
+NO_SEED = -1
+
+
+def plane_bytes(width: int, height: int) -> int:
+    return -(-width*height // 8)
+
+
+def write_lattice(path: str|Path, horizontal: np.ndarray, vertical: np.ndarray,
+                  prob: float, seed: int=None) -> None:
+    """Save both link planes bit-packed after a fixed size header.
+
+    The layout is the header, then ``packbits`` of the horizontal and of
+    the vertical links in x-major order, so the planes can be memory
+    mapped straight from the file.
+    """
+    width, height = horizontal.shape
+    header = np.zeros((), HEADER_DTYPE)
+    header['magic'] = MAGIC
+    header['version'] = VERSION
+    header['width'], header['height'] = width, height
+    header['prob'] = prob
+    header['seed'] = NO_SEED if seed is None else seed
+    with open(path, 'wb') as file:
+        file.write(header.tobytes())
+        for links in (horizontal, vertical):
+            if not isinstance(links, PackedLinks):
+                links = PackedLinks.pack(links)
+            file.write(np.asarray(links.bits).tobytes())
+
+
+def read_header(path: str|Path) -> np.void:
+    with open(path, 'rb') as file:
+        header = np.frombuffer(file.read(HEADER_DTYPE.itemsize), HEADER_DTYPE)
+    if len(header) != 1 or header[0]['magic'] != MAGIC:
+        raise ValueError(f"{path} is not a lattice file")
+    if header[0]['version'] != VERSION:
+        raise ValueError(f"Unsupported lattice file version {header[0]['version']}")
+    return header[0]
+
+
+def read_packed(path: str|Path, mmap_mode: str='r') -> Tuple[np.void, np.ndarray]:
+    """Header and the ``(2, n_bytes)`` packed planes, memory mapped."""
+    header = read_header(path)
+    shape = (2, plane_bytes(int(header['width']), int(header['height'])))
+    planes = np.memmap(path, np.uint8, mmap_mode, HEADER_DTYPE.itemsize, shape)
+    return header, planes
+
+
+def read_lattice(path: str|Path) -> Tuple[np.void, PackedLinks, PackedLinks]:
+    """Header and memory mapped horizontal and vertical links of a lattice file."""
+    header, planes = read_packed(path)
+    shape = int(header['width']), int(header['height'])
+    return header, PackedLinks(planes[0], shape), PackedLinks(planes[1], shape)
@@ -0,0 +1,105 @@
+import operator
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from settings import *
+
+
+class PackedLinks:
+    """A 2-d plane of links stored one bit per bond.
+
+    Bits are packed in x-major order like ``np.packbits(links, axis=None)``,
+    which is also the layout of a plane in a lattice file, so a memory
+    mapped file can be used as is. Indexing unpacks only the rows of the
+    first axis that are asked for, and ``np.asarray`` unpacks everything.
+    """
+    ndim = 2
+    dtype = np.dtype(bool)
+
+    def __init__(self, bits: np.ndarray, shape: Tuple[int, int]) -> None:
+        self.bits = bits
+        self.shape = tuple(shape)
+        self.size = self.shape[0] * self.shape[1]
+
+    @classmethod
+    def pack(cls, links: np.ndarray) -> 'PackedLinks':
+        return cls(np.packbits(np.asarray(links, bool), axis=None), links.shape)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def rows(self, x0: int, x1: int) -> np.ndarray:
+        """Unpacked links of ``x0 <= x < x1``."""
+        height = self.shape[1]
+        x1 = max(x1, x0)
+        start, stop = x0*height, x1*height
+        chunk = self.bits[start//8:-(-stop//8)]
+        bits = np.unpackbits(chunk, count=stop - start + start%8)[start%8:]
+        return bits.view(bool).reshape(x1-x0, height)
+
+    def row_chunks(self, n_nodes: int=BATCH_NODES) -> Iterator[Tuple[int, np.ndarray]]:
+        step = max(n_nodes // max(self.shape[1], 1) // 8 * 8, 8)
+        for x0 in range(0, self.shape[0], step):
+            yield x0, self.rows(x0, min(x0+step, self.shape[0]))
+
+    def flatnonzero(self, dtype: np.dtype=np.int64) -> np.ndarray:
+        """Flat indices of the open links, cast to ``dtype`` chunk by chunk."""
+        height = self.shape[1]
+        parts = [(np.flatnonzero(chunk) + x0*height).astype(dtype, copy=False)
+                 for x0, chunk in self.row_chunks()]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        links = self.rows(0, self.shape[0])
+        return links if dtype is None else links.astype(dtype)
+
+    def __getitem__(self, index):
+        index = index if isinstance(index, tuple) else (index, )
+        first, rest = index[0], index[1:]
+        if isinstance(first, slice):
+            x0, x1, step = first.indices(self.shape[0])
+            if step == 1:
+                return self.rows(x0, x1)[(slice(None), ) + rest]
+        elif not isinstance(first, np.ndarray):
+            x = operator.index(first)
+            if x < 0:
+                x += self.shape[0]
+            if not 0 <= x < self.shape[0]:
+                raise IndexError(f"Index {first} is out of bounds for axis 0 "
+                                 f"with size {self.shape[0]}")
+            return self.rows(x, x+1)[(0, ) + rest]
+        return np.asarray(self)[index]
+
+    def __setitem__(self, index, value) -> None:
+        links = np.array(self)
+        links[index] = value
+        self.bits = np.packbits(links, axis=None)
+
+
+def random_links(rng: np.random.Generator, shape: Tuple[int, int], prob: float,
+                 axis: int, packed: bool=False) -> np.ndarray|PackedLinks:
+    """Links open with probability ``prob``, none leaving the lattice along ``axis``.
+
+    Uniforms are drawn as float32 in row chunks of about ``BATCH_NODES``
+    nodes, so no array wider than the result itself is ever allocated.
+    """
+    width, height = shape
+    step = max(BATCH_NODES // max(height, 1) // 8 * 8, 8)
+    links = np.zeros(shape, bool) if not packed else None
+    bits = []
+    for x0 in range(0, width, step):
+        x1 = min(x0+step, width)
+        chunk = rng.random((x1-x0, height), np.float32) < prob
+        if axis == 0 and x1 == width:
+            chunk[-1, :] = False
+        if axis == 1:
+            chunk[:, -1] = False
+        if packed:
+            bits.append(np.packbits(chunk, axis=None))
+        else:
+            links[x0:x1] = chunk
+    if packed:
+        return PackedLinks(np.concatenate(bits) if bits else np.zeros(0, np.uint8), shape)
+    return links
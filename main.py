@@ -3,7 +3,8 @@ import tkinter.ttk as ttk
 
 from instruments import Instruments_panel
 from painter import Painter
-from plotter import AreaPlot, Average_size, Distr_per_prob, Sizes_plot, Cluster_sizes, Cluster_sizes_log
+from plotter import (AreaPlot, Average_size, BasePlotter, Cluster_sizes,
+                     Cluster_sizes_log, Distr_per_prob, Sizes_plot)
 from settings import *
 from visualization import Visualization
 
@@ -16,6 +17,7 @@ class App(tk.Tk):
         self.geometry("{0}x{1}".format(*WINDOW_ZISE))
         notebook = ttk.Notebook(self)
         notebook.pack(expand=True, fill=tk.BOTH)
+        notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
 
         painter = Visualization(self)
         painter.pack(fill=tk.BOTH, expand=True)
@@ -50,7 +52,12 @@ class App(tk.Tk):
         distr_per_prob.open("plots/Distr_per_prob_plot.npy")
         distr_per_prob.pack(fill=tk.BOTH, expand=True)
         notebook.add(distr_per_prob, text="Cluster size per prob")
-        
+    
+    def on_tab_changed(self, event) -> None:
+        notebook = event.widget
+        tab = notebook.nametowidget(notebook.select())
+        if isinstance(tab, BasePlotter):
+            tab.show()
 
 if __name__ == "__main__":
     App().mainloop()
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""Parameters and result arrays of every plot, free of any GUI imports.
+
+The Tk plotters in ``plotter.py`` are views over these models, so the
+models can be used on machines without a display.
+"""
+import numpy as np
+
+from experiments import (Data, area_near_threshold, area_per_prob, average_size,
+                         cluster_size_distribution, distribution_per_prob,
+                         leak_surface, save_data, threshold_fit,
+                         threshold_per_size, trial_counts)
+from grid import Grid
+from settings import *
+from threshold import NU
+
+
+class Model:
+    def __init__(self, seed: int=None) -> None:
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.data: Data = None
+
+    def calculate(self) -> None:
+        raise NotImplementedError
+
+    def save(self, file) -> None:
+        save_data(file, self.data)
+
+    def open(self, file) -> None:
+        data = np.load(file, mmap_mode='r')
+        if isinstance(data, np.lib.npyio.NpzFile):
+            with data:
+                data = tuple(data[f'arr_{i}'] for i in range(len(data.files)))
+        self.data = data
+
+
+class Sizes_model(Model):
+    def __init__(self, seed: int=None) -> None:
+        super().__init__(seed)
+        #Размеры сетки
+        self.sizes = np.arange(10, 40)
+        #Вероятность связи
+        self.prob_points = np.linspace(0, 1, 20)
+        #Количество тестов на каждую сетку
+        self.total_n_points = 10**2
+        #Полуширина доверительного интервала и бюджет адаптивного режима
+        self.target = 0.05
+        self.budget = 10**5
+
+    #Количество тестов на кажду вероятность связи
+    @property
+    def n_tests(self) -> np.ndarray:
+        return trial_counts(self.prob_points, self.total_n_points)
+
+    def calculate(self, n_workers: int=N_WORKERS, method: str='sampling') -> None:
+        self.data = leak_surface(self.sizes, self.prob_points, self.n_tests,
+                                 n_workers, method, self.seed, self.target, self.budget)
+
+
+class Cluster_sizes_model(Model):
+    def __init__(self, seed: int=None) -> None:
+        super().__init__(seed)
+        self.size = SIZE
+        self.prob = PROBABILITY
+        self.n_grids = 10**5
+
+    def calculate(self, n_workers: int=N_WORKERS, store: str=None) -> None:
+        self.data = cluster_size_distribution(self.size, self.prob, self.n_grids,
+                                              n_workers, store, self.seed)
+
+
+class Area_model(Model):
+    def __init__(self, seed: int=None) -> None:
+        super().__init__(seed)
+        self.size = 40, 40
+        self.eps = np.linspace(0.0, 0.001, 10)
+        self.total_n_points = 100
+
+    def calculate(self) -> None:
+        self.data = area_near_threshold(self.size, self.eps,
+                                        self.total_n_points, self.rng)
+
+
+class Area_model2(Model):
+    def __init__(self, seed: int=None) -> None:
+        super().__init__(seed)
+        self.size = 40, 40
+        self.eps = 0.001
+        self.total_n_points = 10**5
+        self.prob_points = np.linspace(0.5-self.eps, 0.5+self.eps, 10)
+
+    def calculate(self) -> None:
+        self.data = area_per_prob(self.size, self.prob_points,
+                                  self.total_n_points, self.rng)
+
+
+class Average_size_model(Model):
+    def __init__(self, seed: int=None) -> None:
+        super().__init__(seed)
+        self.size = 40, 40
+        self.n_grids = 10**3
+        self.prob_points = np.linspace(0, 1, 101)
+        self.target = 0.02
+
+    def calculate(self, n_workers: int=N_WORKERS, method: str='sampling') -> None:
+        self.data = average_size(self.size, self.prob_points, self.n_grids,
+                                 n_workers, method, self.seed, self.target)
+
+
+class Distr_per_prob_model(Model):
+    def __init__(self, seed: int=None) -> None:
+        super().__init__(seed)
+        self.size = 5, 5
+        #Вероятность связи
+        self.prob_points = np.linspace(0, 1, 21)
+        #Количество тестов на каждую сетку
+        self.n_grids = 10**5
+
+    def calculate(self, n_workers: int=N_WORKERS) -> None:
+        self.data = distribution_per_prob(self.size, self.prob_points, self.n_grids,
+                                          n_workers, self.seed)
+
+
+class Threshold_model(Model):
+    def __init__(self, seed: int=None) -> None:
+        super().__init__(seed)
+        self.sizes = np.array([16, 32, 64, 128, 256])
+        self.n_samples = 200
+        #None подбирает показатель nu вместе с порогом
+        self.nu = NU
+
+    def calculate(self, n_workers: int=N_WORKERS) -> None:
+        self.data = threshold_per_size(self.sizes, self.n_samples,
+                                       n_workers=n_workers, seed=self.seed)
+
+    def fit(self) -> dict:
+        return threshold_fit(self.data, self.nu)
+
+
+class Cluster_count_model(Model):
+    """Number of clusters of the ``n_sizes`` smallest sizes present on a grid."""
+
+    def __init__(self, grid: Grid, n_sizes: int=30) -> None:
+        super().__init__()
+        self.grid = grid
+        self.n_sizes = n_sizes
+        self.version = None
+
+    def current(self) -> bool:
+        """Whether ``data`` was counted on the present labels of the grid."""
+        return self.grid.labels_current() and self.version == self.grid.labels_version
+
+    def calculate(self) -> None:
+        counts = np.bincount(self.grid.cluster_stats()['size'][1:])
+        x = np.flatnonzero(counts)[:self.n_sizes]
+        self.data = x, counts[x]
+        self.version = self.grid.labels_version
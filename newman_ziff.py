@@ -0,0 +1,182 @@
+from typing import Dict, Sequence
+
+import numpy as np
+
+from labeling import bond_endpoints
+from spanning import HORIZONTAL, border_nodes, sides_of
+
+SIDE_FLAGS = {'left': 1, 'right': 2, 'top': 4, 'bottom': 8}
+
+
+def binomial_weights(n_bonds: int, probs: Sequence[float]) -> np.ndarray:
+    """Binomial probabilities of ``0..n_bonds`` open bonds, one row per prob."""
+    probs = np.asarray(probs, float)
+    n = np.arange(n_bonds+1)
+    log_factorials = np.concatenate(((0.0, ), np.cumsum(np.log(np.arange(1, n_bonds+1)))))
+    log_choose = log_factorials[-1] - log_factorials - log_factorials[::-1]
+    weights = np.zeros((len(probs), n_bonds+1))
+    for i, p in enumerate(probs):
+        if p <= 0:
+            weights[i, 0] = 1
+        elif p >= 1:
+            weights[i, -1] = 1
+        else:
+            weights[i] = np.exp(log_choose + n*np.log(p) + (n_bonds-n)*np.log1p(-p))
+    return weights
+
+
+class NewmanZiff:
+    """Newman-Ziff sweep: observables for every number of open bonds.
+
+    Each trial opens all bonds of the lattice one by one in random order
+    and records the observables after every step, so a single pass covers
+    the whole probability range. Totals over trials add up, and ``at``
+    turns them into values at any ``p`` through the binomial distribution
+    of the number of open bonds. The size histogram is tracked as sparse
+    ``(open bonds, size)`` changes, so pieces stay small to send back.
+    """
+
+    def __init__(self, width: int, height: int, direction: str=HORIZONTAL,
+                 track_histogram: bool=False) -> None:
+        self.size = self.width, self.height = width, height
+        self.n_nodes = width * height
+        self.direction = direction
+        self.track_histogram = track_histogram
+
+        horizontal = np.ones(self.size, bool)
+        vertical = np.ones(self.size, bool)
+        horizontal[-1, :] = False
+        vertical[:, -1] = False
+        self.u, self.v = bond_endpoints(horizontal, vertical)
+        self.n_bonds = len(self.u)
+
+        self.flags = np.zeros(self.n_nodes, np.int64)
+        for side, nodes in border_nodes(width, height).items():
+            self.flags[nodes] |= SIDE_FLAGS[side]
+        self.need = [SIDE_FLAGS[a] | SIDE_FLAGS[b] for a, b in sides_of(direction)]
+
+        self.n_trials = 0
+        self.totals = {name: np.zeros(self.n_bonds+1)
+                       for name in ('largest', 'mean_size', 'n_clusters', 'spanning')}
+        # Change of the number of clusters of a size, keyed by n*(n_nodes+1) + size
+        self.delta_keys = np.zeros(0, np.int64)
+        self.delta_counts = np.zeros(0, np.int64)
+
+    def spans(self, flags: int) -> bool:
+        return all(flags & need == need for need in self.need)
+
+    def run(self, n_trials: int, rng: np.random.Generator=None) -> None:
+        rng = np.random.default_rng() if rng is None else rng
+        for _ in range(n_trials):
+            self.run_trial(rng)
+
+    def run_trial(self, rng: np.random.Generator) -> None:
+        order = rng.permutation(self.n_bonds)
+        parent = list(range(self.n_nodes))
+        sizes = [1] * self.n_nodes
+        flags = self.flags.tolist()
+        largest = [0] * (self.n_bonds+1)
+        squares = [0] * (self.n_bonds+1)
+        merges = [0] * (self.n_bonds+1)
+        deltas = []
+
+        current_largest = 1 if self.n_nodes else 0
+        current_squares = self.n_nodes
+        n_merges = 0
+        spanning_from = 0 if any(map(self.spans, flags)) else self.n_bonds+1
+        largest[0], squares[0] = current_largest, current_squares
+
+        bonds = zip(self.u[order].tolist(), self.v[order].tolist())
+        for n, (a, b) in enumerate(bonds, 1):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            while parent[b] != b:
+                parent[b] = parent[parent[b]]
+                b = parent[b]
+            if a != b:
+                size_a, size_b = sizes[a], sizes[b]
+                if size_a < size_b:
+                    a, b = b, a
+                parent[b] = a
+                merged = sizes[a] = size_a + size_b
+                flags[a] |= flags[b]
+                n_merges += 1
+                current_squares += 2 * size_a * size_b
+                if merged > current_largest:
+                    current_largest = merged
+                if spanning_from > n and self.spans(flags[a]):
+                    spanning_from = n
+                if self.track_histogram:
+                    deltas.append((n, size_a, size_b, merged))
+            largest[n], squares[n], merges[n] = current_largest, current_squares, n_merges
+
+        self.totals['largest'] += largest
+        self.totals['mean_size'] += np.array(squares) / max(self.n_nodes, 1)
+        self.totals['n_clusters'] += self.n_nodes - np.array(merges)
+        self.totals['spanning'][spanning_from:] += 1
+        if deltas:
+            n, size_a, size_b, merged = np.array(deltas, np.int64).T
+            row = n * (self.n_nodes+1)
+            keys = np.concatenate((row + size_a, row + size_b, row + merged))
+            counts = np.repeat([-1, -1, 1], len(n))
+            self.add_deltas(keys, counts)
+        self.n_trials += 1
+
+    def add_deltas(self, keys: np.ndarray, counts: np.ndarray) -> None:
+        keys, index = np.unique(np.concatenate((self.delta_keys, keys)), return_inverse=True)
+        counts = np.bincount(index, np.concatenate((self.delta_counts, counts)),
+                             minlength=len(keys)).astype(np.int64)
+        kept = counts != 0
+        self.delta_keys, self.delta_counts = keys[kept], counts[kept]
+
+    def histogram(self) -> np.ndarray:
+        """Mean number of clusters of every size, one dense row per open bond count."""
+        deltas = np.zeros((self.n_bonds+1) * (self.n_nodes+1), np.int64)
+        deltas[self.delta_keys] = self.delta_counts
+        deltas = deltas.reshape(self.n_bonds+1, self.n_nodes+1)
+        histogram = np.cumsum(deltas, axis=0) / max(self.n_trials, 1)
+        histogram[:, 1] += self.n_nodes
+        return histogram
+
+    def histogram_at(self, weights: np.ndarray) -> np.ndarray:
+        """Mean histogram for rows of open bond count ``weights``, from the sparse changes.
+
+        A change at ``n`` bonds counts for every ``n' >= n``, so it is
+        weighted by the tail sums of the weights.
+        """
+        tails = np.cumsum(weights[:, ::-1], axis=1)[:, ::-1]
+        n, sizes = np.divmod(self.delta_keys, self.n_nodes+1)
+        histogram = np.zeros((len(weights), self.n_nodes+1))
+        for row, tail in zip(histogram, tails):
+            row += np.bincount(sizes, tail[n] * self.delta_counts, minlength=self.n_nodes+1)
+        histogram /= max(self.n_trials, 1)
+        histogram[:, 1] += self.n_nodes * weights.sum(axis=1)
+        return histogram
+
+    def per_bonds(self) -> Dict[str, np.ndarray]:
+        observables = {name: total / max(self.n_trials, 1)
+                       for name, total in self.totals.items()}
+        if self.track_histogram:
+            observables['histogram'] = self.histogram()
+        return observables
+
+    def at(self, probs: Sequence[float]) -> Dict[str, np.ndarray]:
+        """Observables at the given bond probabilities, one row per prob."""
+        weights = binomial_weights(self.n_bonds, probs)
+        observables = {name: weights @ total / max(self.n_trials, 1)
+                       for name, total in self.totals.items()}
+        if self.track_histogram:
+            observables['histogram'] = self.histogram_at(weights)
+        return observables
+
+    def __add__(self, other: 'NewmanZiff') -> 'NewmanZiff':
+        if (other.size, other.direction) != (self.size, self.direction):
+            raise ValueError("Cant add Newman-Ziff sweeps of different lattices")
+        result = NewmanZiff(*self.size, self.direction, self.track_histogram)
+        result.n_trials = self.n_trials + other.n_trials
+        result.totals = {name: total + other.totals[name]
+                         for name, total in self.totals.items()}
+        result.delta_keys, result.delta_counts = self.delta_keys, self.delta_counts
+        result.add_deltas(other.delta_keys, other.delta_counts)
+        return result
@@ -1,9 +1,11 @@
+import threading
 import tkinter as tk
 import tkinter.ttk as ttk
 from math import ceil
-from typing import Tuple
+from typing import Callable, Tuple
 
 import numpy as np
+from PIL import Image as im
 from PIL import ImageTk as itk
 
 from cluster_info import Cluster_info
@@ -11,6 +13,7 @@ from graphics import Drawer
 from grid import Grid
 from misc import color_from_rgb
 from settings import *
+from worker import Background_worker
 
 
 class Painter(ttk.Frame):
@@ -18,23 +21,48 @@ class Painter(ttk.Frame):
     def __init__(self, parent, grid: Grid=None) -> None:
         super().__init__(parent)
         self.parent = parent
-        self.grid = Grid() if grid is None else grid
+        self.grid = Grid(coupled=True) if grid is None else grid
         self.drawer = Drawer(self.grid)
 
         self.padding = PADDING
         self.line_size = LINE_SIZE
         self.gap_size = GAP_SIZE
         self.size = None, None
+        self.zoom = None
+        self.fit = None
+        self.center = None
+        self.scale = 1
+        self.block = 1
+        self.origin = np.zeros(2)
+        self.drag_start = None
+        self.canvas_size = np.zeros(2)
+        self.frame_size = np.zeros(2)
+        
+        self.lock = threading.Lock()
+        self.pending_sync = []
+        self.pending_done = []
+        self.property_changed = False
+        self.drawn_size = None
+        self.drawn = None, None
+        self.worker = Background_worker(self, self.render, self.on_rendered,
+                                        self.on_idle)
         
         self.canvas = tk.Canvas(self, bg=color_from_rgb(BACKGROUND_COLOR), 
                                 highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.progress = ttk.Progressbar(self, mode='indeterminate')
         self.cluster_info = None
         self.point = None
         
         self.canvas.bind('<Button-1>', self.on_left_mouse)
         self.canvas.bind('<Button-2>', self.on_middle_mouse)
         self.canvas.bind('<Button-3>', self.on_right_mouse)
+        self.canvas.bind('<MouseWheel>', self.on_wheel)
+        self.canvas.bind('<Button-4>', self.on_wheel)
+        self.canvas.bind('<Button-5>', self.on_wheel)
+        self.canvas.bind('<Shift-Button-1>', self.on_drag_start)
+        self.canvas.bind('<Shift-B1-Motion>', self.on_drag)
+        self.canvas.bind('<Control-Button-1>', self.reset_view)
         self.resizing = None
         self.bind('<Configure>', self.on_configure)
     
@@ -49,26 +77,53 @@ class Painter(ttk.Frame):
     
     def on_resize(self) -> None:
         self.resizing = None
-        self.update(grid_changed=False)
+        self.update()
+
+    def on_wheel(self, event) -> None:
+        zoom_in = event.num == 4 or getattr(event, 'delta', 0) > 0
+        factor = ZOOM_STEP if zoom_in else 1 / ZOOM_STEP
+        zoom = self.zoom if self.zoom is not None else self.fit or self.scale
+        # The zoom stays continuous, only the drawn scale is rounded, so
+        # small steps add up instead of rounding back to the same scale.
+        self.zoom = min(max(zoom * factor, 1 / MAX_BLOCK), MAX_ZOOM)
+        cursor = np.array((event.x, event.y), float)
+        under_cursor = (cursor - self.origin) / self.scale
+        self.center = under_cursor - (cursor - self.canvas_center()) / rounded_scale(self.zoom)
+        self.update()
+    
+    def on_drag_start(self, event) -> None:
+        self.drag_start = np.array((event.x, event.y), float)
+    
+    def on_drag(self, event) -> None:
+        if self.drag_start is None:
+            return
+        position = np.array((event.x, event.y), float)
+        self.center = self.view_center() - (position - self.drag_start) / self.scale
+        self.drag_start = position
+        self.update()
+    
+    def reset_view(self, *_) -> None:
+        self.zoom = None
+        self.center = None
+        self.update()
 
     def on_left_mouse(self, event) -> None:
+        if self.worker.busy:
+            self.bell()
+            return
         self.show_cluster_info((event.x, event.y))
 
     def on_middle_mouse(self, *_) -> None:
-        self.grid.is_leaks()
-        self.create_palette()
-        self.update()
+        self.request(sync=self.grid.is_leaks)
 
     def on_right_mouse(self, *_) -> None:
-        self.grid.find_clusters()
-        self.create_palette()
-        self.update()
+        self.request(sync=self.grid.cluster_stats)
 
     def show_cluster_info(self, widget_coord: Tuple[int, int]) -> None:
         x, y = self.widget_pos_to_grid(widget_coord)
         cluster = self.grid.get_cluster_on(x, y)
         center = self.grid_pos_to_widget(cluster.center_of_mass)
-        r = cluster.radius * self.drawer.line_lenght
+        r = cluster.radius * self.scale
         x0, y0 = center - r
         x1, y1 = center + r
         if self.point is not None:
@@ -77,59 +132,145 @@ class Painter(ttk.Frame):
                                              outline="white",
                                              width=2)
         self.canvas.update()
-        if self.cluster_info is not None:
+        key = cluster.name, self.grid.labels_version
+        if self.cluster_info is not None and self.cluster_info.winfo_exists():
+            if self.cluster_info.key == key:
+                self.cluster_info.lift()
+                return
             self.cluster_info.destroy()
         self.cluster_info = Cluster_info(self, cluster)
         
     def grid_pos_to_widget(self, coord: Tuple[int, int]) -> Tuple[int, int]:
-        pos = np.array(coord)
-        pos *= self.drawer.line_lenght
-        pos += [self.canvas.winfo_width()//2, self.canvas.winfo_height()//2]
-        pos -= [self.drawer.width//2, self.drawer.height//2]
-        pos += self.drawer.offset_lt
+        pos = np.array(coord, float)
+        pos *= self.scale
+        pos += self.origin
         return pos
     
     def widget_pos_to_grid(self, coord: Tuple[int, int]) -> Tuple[int, int]:
-        pos = np.array(coord)
-        pos -= [self.canvas.winfo_width()//2, self.canvas.winfo_height()//2]
-        pos += [self.drawer.width//2, self.drawer.height//2]
-        pos = np.around(pos / self.drawer.line_lenght).astype(int)
+        pos = np.array(coord, float)
+        pos -= self.origin
+        pos = np.around(pos / self.scale).astype(int)
         pos = np.maximum(pos, [0, 0])
         pos = np.minimum(pos, [self.grid.width-1, self.grid.height-1])
         return tuple(pos)
     
+    def canvas_center(self) -> np.ndarray:
+        return self.canvas_size // 2
+    
+    def view_center(self) -> np.ndarray:
+        if self.zoom is None or self.center is None:
+            return np.array(((self.grid.width-1) / 2, (self.grid.height-1) / 2))
+        return np.clip(self.center, 0, (self.grid.width-1, self.grid.height-1))
+    
     def update_line(self) -> None:
-        image_width = self.winfo_width() - self.padding*2
-        image_height = self.winfo_height() - self.padding*2
-        line_lenght = max(1, min(int(image_width / (self.grid.width-1)), 
-                                 int(image_height / (self.grid.height-1))))
+        image_width, image_height = self.frame_size - self.padding*2
+        fit = min(image_width / max(self.grid.width-1, 1), 
+                  image_height / max(self.grid.height-1, 1), MAX_ZOOM)
+        self.fit = fit
+        scale = rounded_scale(fit if self.zoom is None else self.zoom)
         
-        point_diameter = ceil(line_lenght * self.gap_size)
-        line_width = round(point_diameter * self.line_size)
-        self.drawer.set_properties(line_lenght,
-                                   line_width,
-                                   point_diameter)
+        if scale >= 1:
+            line_lenght = int(scale)
+            point_diameter = ceil(line_lenght * self.gap_size)
+            line_width = round(point_diameter * self.line_size)
+            self.drawer.set_properties(line_lenght,
+                                       line_width,
+                                       point_diameter)
+            self.block = 1
+            self.scale = line_lenght
+        else:
+            self.block = round(1 / scale)
+            self.scale = scale
+        self.update_window()
+    
+    def update_window(self) -> None:
+        """Point the drawer at the nodes that are visible on the canvas."""
+        self.origin = self.canvas_center() - self.view_center() * self.scale
+        first = np.floor(-self.origin / self.scale).astype(int) - 1
+        last = np.ceil((self.canvas_size - self.origin) / self.scale).astype(int) + 2
+        first = first // self.block * self.block
+        self.drawer.set_window((first[0], last[0], first[1], last[1]))
 
     def on_grid_change(self) -> None:
         self.update()
     def on_propery_change(self) -> None:
-        self.update(grid_changed=False)
-    def update(self, property_changed: bool=True, grid_changed: bool=True) -> None:
-        if grid_changed:
-            self.drawer.create_palette()
-        if property_changed:
+        self.update()
+    def update(self, property_changed: bool=True) -> None:
+        self.request(property_changed=property_changed)
+
+    def request(self, sync: Callable[[], None]=None, property_changed: bool=True,
+                on_done: Callable[[], None]=None) -> None:
+        """Redraw on the background thread without blocking the Tk loop.
+
+        ``sync`` is run on the worker before drawing, so heavy grid
+        updates go there too. Requests made while the worker is busy are
+        merged into one rerun, and ``on_done`` callbacks are called once
+        the picture on the canvas is up to date. What the grid changed is
+        read from its versions, so requests that changed nothing are cheap.
+        """
+        self.canvas_size = np.array((self.canvas.winfo_width(), self.canvas.winfo_height()), float)
+        self.frame_size = np.array((self.winfo_width(), self.winfo_height()), float)
+        with self.lock:
+            if sync is not None:
+                self.pending_sync.append(sync)
+            if on_done is not None:
+                self.pending_done.append(on_done)
+            self.property_changed |= property_changed
+        if not self.worker.busy:
+            self.progress.place(relx=0, rely=1, relwidth=1, anchor=tk.SW)
+            self.progress.start()
+        self.worker.request()
+
+    def render(self) -> Tuple[im.Image, np.ndarray]:
+        with self.lock:
+            syncs, self.pending_sync = self.pending_sync, []
+            property_changed, self.property_changed = self.property_changed, False
+        for sync in syncs:
+            sync()
+        if self.grid.labels_current():
+            # Built here so a click on the canvas only looks up a row
+            self.grid.cluster_stats()
+        if property_changed or self.grid.size != self.drawn_size:
+            self.drawn_size = self.grid.size
             self.update_line()
+        else:
+            self.update_window()
+        if self.block == 1:
+            image = self.drawer.compute_image()
+            corner = self.grid_pos_to_widget(self.drawer.view[::2]) - self.drawer.offset_lt
+        else:
+            image = self.drawer.compute_overview(self.block)
+            corner = self.grid_pos_to_widget(self.drawer.view[::2])
+        return image, corner
+
+    def on_rendered(self, result: Tuple[im.Image, np.ndarray]) -> None:
+        image, corner = result
+        drawn = image, tuple(np.around(corner))
+        if drawn[0] is self.drawn[0] and drawn[1] == self.drawn[1]:
+            return
+        self.drawn = drawn
         self.canvas.delete("all")
-        self.draw()
-    
-    def draw(self):
-        image = self.drawer.compute_image()
+        self.point = None
         self.ph = itk.PhotoImage(image)
-        self.canvas.create_image(self.canvas.winfo_width()//2, 
-                                 self.canvas.winfo_height()//2, 
-                                 anchor=tk.CENTER, image=self.ph)
+        self.canvas.create_image(*np.around(corner), 
+                                 anchor=tk.NW, image=self.ph)
         self.canvas.image = self.ph
 
+    def on_idle(self) -> None:
+        self.progress.stop()
+        self.progress.place_forget()
+        with self.lock:
+            callbacks, self.pending_done = self.pending_done, []
+        for callback in callbacks:
+            callback()
+
+def rounded_scale(zoom: float) -> float:
+    """Pixels per node actually drawn: whole pixels, or one pixel per whole block."""
+    if zoom >= 1:
+        return int(zoom)
+    return 1 / ceil(1 / zoom)
+
+
 if __name__ == "__main__":
     root = tk.Tk()
     p = Painter(root)
@@ -1,39 +1,61 @@
 import tkinter as tk
 import tkinter.ttk as ttk
-from operator import attrgetter
 from typing import Tuple
 
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mticker
 import numpy as np
-from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg,
-                                               NavigationToolbar2Tk)
-from tqdm import tqdm
 
-from grid import Grid
+from models import (Area_model, Area_model2, Average_size_model,
+                    Cluster_sizes_model, Distr_per_prob_model, Model,
+                    Sizes_model, Threshold_model)
 
 
 class BasePlotter(ttk.Frame):
-    def __init__(self, parent, size: Tuple[int, int]=(6, 3)) -> None:
+    """A Tk view drawing the data of a model.
+
+    Parameters and calculations live in ``models.py``; matplotlib is only
+    imported once the first plotter is created.
+    """
+    MODEL = Model
+
+    def __init__(self, parent, size: Tuple[int, int]=(6, 3), 
+                 seed: int=None, model: Model=None) -> None:
         super().__init__(parent)
+        from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg,
+                                                       NavigationToolbar2Tk)
+        from matplotlib.figure import Figure
         self.parent = parent
+        self.model = self.MODEL(seed) if model is None else model
         
-        self.figure = plt.Figure(figsize=size)
+        self.figure = Figure(figsize=size)
         figure_canvas = FigureCanvasTkAgg(self.figure, self)
         NavigationToolbar2Tk(figure_canvas, self)
         figure_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
 
-        self.data = None
+        self.drawn = False
     
-    def calculate_data():
-        raise NotImplementedError
+    @property
+    def data(self):
+        return self.model.data
+
+    @data.setter
+    def data(self, data) -> None:
+        self.model.data = data
+        self.drawn = False
+    
+    def calculate_data(self, *args, **kwargs) -> None:
+        self.model.calculate(*args, **kwargs)
+        self.drawn = False
 
     def save(self, file):
-        np.save(file, self.data)
+        self.model.save(file)
         
     def open(self, file):
-        self.data = np.load(file)
-        self.update()
+        self.model.open(file)
+        self.drawn = False
+    
+    def show(self) -> None:
+        if not self.drawn:
+            self.update()
         
     def update(self) -> None:
         self.figure.clear()
@@ -41,6 +63,7 @@ class BasePlotter(ttk.Frame):
         self.set_labels()
         self.set_data()
         self.figure.canvas.draw_idle()
+        self.drawn = True
         
     def create_axes(self) -> None:
         raise NotImplementedError
@@ -52,40 +75,10 @@ class BasePlotter(ttk.Frame):
         raise NotImplementedError
 
 class Sizes_plot(BasePlotter):
-    def __init__(self, parent) -> None:
-        super().__init__(parent, (6, 6))
-        self.grid = Grid(find_all_clusters=False, 
-                         update_on_init=False, 
-                         update_on_changes=False)
-
-        #Размеры сетки
-        self.sizes = np.arange(10, 40)
-        #Вероятность связи
-        self.prob_points = np.linspace(0, 1, 20)
-        #Количество тестов на каждую сетку
-        self.total_n_points = 10**2
-
-        #Количество тестов на кажду вероятность связи
-        self.n_tests = np.abs(1/(self.prob_points-0.5))
-        self.n_tests = self.n_tests / np.sum(self.n_tests) * self.total_n_points + 1
-        self.n_tests = self.n_tests.astype(int)
-
-    
-    def calculate_data(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        data = np.full((*self.prob_points.shape, *self.sizes.shape, 10**4), 
-                       float('nan'))
+    MODEL = Sizes_model
 
-        for y, s in tqdm(enumerate(self.sizes), total=len(self.sizes)):
-            self.grid.change_size(s, s)
-            for x, p in enumerate(self.prob_points):
-                self.grid.change_probability(p)
-                for i in range(self.n_tests[x]):
-                    self.grid.update()
-                    data[x, y, i] = self.grid.is_leaks()
-                    
-        X, Y = np.meshgrid(self.sizes, self.prob_points)
-        Z = np.nanmean(data, axis=2)
-        self.data = X, Y, Z
+    def __init__(self, parent, seed: int=None, model: Model=None) -> None:
+        super().__init__(parent, (6, 6), seed, model)
     
     def create_axes(self) -> None:
         self.axes = self.figure.add_subplot(projection='3d')
@@ -96,31 +89,22 @@ class Sizes_plot(BasePlotter):
         self.axes.set_zlabel("Шанс Протечки")
     
     def set_data(self) -> None:
-        X, Y, Z = self.data
+        X, Y, Z = self.data[:3]
         self.axes.plot_surface(X, Y, Z)
+        if len(self.data) > 3:
+            from mpl_toolkits.mplot3d.art3d import Line3DCollection
+            E = self.data[3]
+            segments = np.stack((np.stack((X, Y, Z-E), axis=-1),
+                                 np.stack((X, Y, Z+E), axis=-1)), axis=-2)
+            self.axes.add_collection3d(Line3DCollection(segments.reshape(-1, 2, 3),
+                                                        colors='black', linewidths=0.5))
     
 
 class Cluster_sizes(BasePlotter):
-    def __init__(self, parent) -> None:
-        super().__init__(parent, (6, 6))
-        self.grid = Grid(find_all_clusters=True, 
-                         update_on_init=False, 
-                         update_on_changes=False)
-    
-    def calculate_data(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        data = np.full(self.grid.width*self.grid.height, int())
+    MODEL = Cluster_sizes_model
 
-        n_grids = 10**5
-        count = 0
-        for _ in tqdm(range(n_grids)):
-            self.grid.update()
-            count += len(self.grid.clusters_list)-1
-            for c in self.grid.clusters_list[1:]:
-                data[c.size] += 1
-                    
-        X = np.arange(1, data.shape[0])
-        Y = data[1:] / count
-        self.data = X, Y
+    def __init__(self, parent, seed: int=None, model: Model=None) -> None:
+        super().__init__(parent, (6, 6), seed, model)
     
     def create_axes(self) -> None:
         self.axes = self.figure.add_subplot()
@@ -142,33 +126,10 @@ class Cluster_sizes_log(Cluster_sizes):
         self.axes.set_yscale('log')
 
 class AreaPlot(BasePlotter):
-    def __init__(self, parent):
-        super().__init__(parent, (6, 6))
-
-        self.grid = Grid(40, 40, 
-                         find_all_clusters=True, 
-                         update_on_init=False, 
-                         update_on_changes=True)
+    MODEL = Area_model
 
-        self.eps = np.linspace(0.0, 0.001, 10)
-        self.total_n_points = 100
-        self.prob_points = np.linspace(0.5-self.eps, 0.5+self.eps, 
-                                       self.total_n_points, axis=-1)
-        self.get_size = attrgetter('size')
-    
-    def calculate_data(self) -> None:
-        data_max = np.full(self.prob_points.shape, 0)
-        data_mean = np.full(self.prob_points.shape, 0.0)
-
-        for index, prob in tqdm(np.ndenumerate(self.prob_points), total=len(self.eps)*self.total_n_points):
-            self.grid.change_probability(prob)
-            sizes = list(map(self.get_size, self.grid.clusters_list[1:]))
-            data_max[index] = max(sizes)
-            data_mean[index] = sum(sizes) / len(sizes)
-
-        X = self.eps
-        Y = np.mean(data_mean, axis=1)
-        self.data = X, Y
+    def __init__(self, parent, seed: int=None, model: Model=None) -> None:
+        super().__init__(parent, (6, 6), seed, model)
     
     def create_axes(self) -> None:
         self.axes = self.figure.add_subplot()
@@ -182,32 +143,10 @@ class AreaPlot(BasePlotter):
         self.axes.plot(X, Y)
         
 class AreaPlot2(BasePlotter):
-    def __init__(self, parent):
-        super().__init__(parent, (6, 6))
-        self.grid = Grid(40, 40, 
-                         find_all_clusters=True, 
-                         update_on_init=False, 
-                         update_on_changes=True)
-
-        self.eps = 0.001
-        self.total_n_points = 10**5
-        self.prob_points = np.linspace(0.5-self.eps, 0.5+self.eps, 10)
-        self.get_size = attrgetter('size')
-    
-    def calculate_data(self) -> None:
-        data_max = np.full((*self.prob_points.shape, self.total_n_points), 0)
-        data_mean = np.full((*self.prob_points.shape, self.total_n_points), 0.0)
-
-        for index, prob in tqdm(np.ndenumerate(self.prob_points), total=len(self.prob_points)):
-            self.grid.change_probability(prob)
-            for i in range(self.total_n_points):
-                sizes = list(map(self.get_size, self.grid.clusters_list[1:]))
-                data_max[index, i] = max(sizes)
-                data_mean[index, i] = sum(sizes) / len(sizes)
+    MODEL = Area_model2
 
-        X = self.prob_points
-        Y = np.mean(data_mean, axis=-1)
-        self.data = X, Y
+    def __init__(self, parent, seed: int=None, model: Model=None) -> None:
+        super().__init__(parent, (6, 6), seed, model)
     
     def create_axes(self) -> None:
         self.axes = self.figure.add_subplot()
@@ -221,40 +160,10 @@ class AreaPlot2(BasePlotter):
         self.axes.plot(X, Y)
  
 class Average_size(BasePlotter):
-    def __init__(self, parent):
-        super().__init__(parent, (6, 6))
-        self.grid = Grid(40, 40, 
-                         find_all_clusters=True, 
-                         update_on_init=False, 
-                         update_on_changes=False)
-        
-        self.n_grids = 10**3
-        self.prob_points = np.linspace(0, 1, 101)
-    
-    def distribution_for_prob(self, prob: float):
-        self.grid.change_probability(prob)
-        distribution = np.zeros(self.grid.width*self.grid.height+1)
-        
-        count = 0
-        for _ in range(self.n_grids):
-            self.grid.update()
-            count += len(self.grid.clusters_list)-1
-            for c in self.grid.clusters_list[1:]:
-                distribution[c.size] += 1
-        distribution /= self.grid.width*self.grid.height * self.n_grids
-        return distribution
-    
-    def calculate_data(self) -> None:
-        sizes_squere = np.arange(self.grid.width*self.grid.height+1)**2
-        data = np.empty(self.prob_points.shape)
+    MODEL = Average_size_model
 
-        for i, prob in enumerate(tqdm(self.prob_points)):
-            distribution = self.distribution_for_prob(prob)
-            data[i] = np.sum(sizes_squere * distribution)
-                    
-        X = self.prob_points
-        Y = data
-        self.data = X, Y
+    def __init__(self, parent, seed: int=None, model: Model=None) -> None:
+        super().__init__(parent, (6, 6), seed, model)
     
     def create_axes(self) -> None:
         self.axes = self.figure.add_subplot()
@@ -264,44 +173,18 @@ class Average_size(BasePlotter):
         self.axes.set_ylabel("Средний размер кластера")
 
     def set_data(self) -> None:
-        X, Y = self.data
-        self.axes.plot(X, Y)
+        if len(self.data) > 2:
+            X, Y, E = self.data
+            self.axes.errorbar(X, Y, yerr=E, capsize=2)
+        else:
+            X, Y = self.data
+            self.axes.plot(X, Y)
 
 class Distr_per_prob(BasePlotter):
-    def __init__(self, parent) -> None:
-        super().__init__(parent, (6, 6))
-        self.grid = Grid(5, 5, 
-                         find_all_clusters=True,
-                         update_on_init=False,
-                         update_on_changes=False)
+    MODEL = Distr_per_prob_model
 
-        #Вероятность связи
-        self.prob_points = np.linspace(0, 1, 21)
-        #Количество тестов на каждую сетку
-        self.n_grids = 10**5
-       
-    def distribution_for_prob(self, prob: float):
-        self.grid.change_probability(prob)
-        distribution = np.zeros(self.grid.width*self.grid.height+1)
-       
-        count = 0
-        for _ in range(self.n_grids):
-            self.grid.update()
-            count += len(self.grid.clusters_list)-1
-            for c in self.grid.clusters_list[1:]:
-                distribution[c.size] += 1
-        distribution /= self.grid.width*self.grid.height * self.n_grids
-        return distribution[1:]
-   
-    def calculate_data(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        data = list()
-        for prob in tqdm(self.prob_points):
-            data.append(self.distribution_for_prob(prob))
-                   
-                   
-        Z = np.stack(data, axis=0)
-        X, Y = np.meshgrid(np.arange(data[0].shape[0]), self.prob_points)
-        self.data = X, Y, Z
+    def __init__(self, parent, seed: int=None, model: Model=None) -> None:
+        super().__init__(parent, (6, 6), seed, model)
    
     def create_axes(self) -> None:
         self.axes = self.figure.add_subplot(projection='3d')
@@ -316,17 +199,41 @@ class Distr_per_prob(BasePlotter):
    
     def set_data(self) -> None:
         X, Y, Z = self.data
-        Z[Z == 0] = np.nan
-        Z = np.log10(Z)
+        Z = np.log10(np.where(Z == 0, np.nan, Z))
         self.axes.plot_surface(X, Y, Z)
 
 
+class Threshold_plot(BasePlotter):
+    MODEL = Threshold_model
+
+    def __init__(self, parent, seed: int=None, model: Model=None) -> None:
+        super().__init__(parent, (6, 6), seed, model)
+   
+    def create_axes(self) -> None:
+        self.axes = self.figure.add_subplot()
+        self.axes.set_xscale('log')
+   
+    def set_labels(self) -> None:
+        self.axes.set_xlabel("Размер сетки")
+        self.axes.set_ylabel("Порог протекания")
+   
+    def set_data(self) -> None:
+        sizes, thresholds, low, high = self.data
+        self.axes.errorbar(sizes, thresholds, capsize=2, fmt='o',
+                           yerr=(thresholds - low, high - thresholds))
+        fit = self.model.fit()
+        L = np.geomspace(np.min(sizes), np.max(sizes), 100)
+        self.axes.plot(L, fit['p_c'] + fit['a'] * L**(-1/fit['nu']),
+                       label=f"p_c = {fit['p_c']:.4f} ± {fit['p_c_error']:.4f}")
+        self.axes.legend()
+
+
 if __name__ == "__main__":
     root = tk.Tk()
     plot = Distr_per_prob(root)
     plot.pack(fill=tk.BOTH, expand=True)
     plot.calculate_data()
-    plot.save("Distr_per_prob_plot")
+    plot.save("plots/Distr_per_prob_plot.npy")
     plot.update()
 
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
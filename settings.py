@@ -1,9 +1,19 @@
 #Grid default settings
 SIZE = WIDTH, HEIGHT = 40, 40
 PROBABILITY = 0.5
+LABELER = 'union_find'
+
+#Simulation settings
+BATCH_NODES = 2**20
+N_WORKERS = None
+CHECKPOINT_TRIALS = 10**4
+NEWMAN_ZIFF_BONDS = 2**16
+MIN_TRIALS = 100
+THRESHOLD_TOL = 1e-3
+THRESHOLD_GUESS_WIDTH = 0.05
 
 #Instruments settings
-MAX_GRID = 1000
+MAX_GRID = 10**4
 PROBABILITY_STEP = 0.01
 
 #Widget settings
@@ -20,4 +30,9 @@ LINE_SIZE = 1
 GAP_SIZE = 0.5
 PADDING = 10
 BACKGROUND_COLOR = black
-PASSIVE_COLOR = white
\ No newline at end of file
+PASSIVE_COLOR = white
+TILE_SIZE = 64
+ZOOM_STEP = 1.25
+MAX_ZOOM = 200
+MAX_BLOCK = 64
+POLL_INTERVAL = 30
\ No newline at end of file
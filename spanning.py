@@ -0,0 +1,70 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+from labeling import bond_endpoints, connected_components, index_dtype
+
+HORIZONTAL = 'horizontal'
+VERTICAL = 'vertical'
+BOTH = 'both'
+DIRECTIONS = HORIZONTAL, VERTICAL, BOTH
+
+
+def border_nodes(width: int, height: int) -> Dict[str, np.ndarray]:
+    index = np.arange(width*height).reshape(width, height)
+    return {'left': index[0, :], 'right': index[-1, :],
+            'top': index[:, 0], 'bottom': index[:, -1]}
+
+
+def sides_of(direction: str) -> Tuple[Tuple[str, str], ...]:
+    if direction == HORIZONTAL:
+        return (('left', 'right'), )
+    if direction == VERTICAL:
+        return (('top', 'bottom'), )
+    if direction == BOTH:
+        return (('left', 'right'), ('top', 'bottom'))
+    raise ValueError(f"Unknown spanning direction {direction!r}, "
+                     f"expected one of {DIRECTIONS}")
+
+
+def spans(horizontal_links: np.ndarray, vertical_links: np.ndarray,
+          direction: str=HORIZONTAL) -> bool:
+    """Check whether some cluster joins the opposite borders of the lattice.
+
+    Both borders get a virtual super-node linked to all of their nodes,
+    and the union-find stops after the first hooking round in which the
+    two super-nodes end up with one root. The check runs once per round
+    of ``connected_components`` (O(log n) rounds), not once per bond, so
+    a crossing is noticed at the end of the round that completes it. On
+    a planar lattice a left-right and a top-bottom crossing
+    always intersect, so for ``both`` the two checks are done one after
+    another and still describe a single cluster.
+    """
+    width, height = horizontal_links.shape
+    n_nodes = width*height
+    borders = border_nodes(width, height)
+    u, v = bond_endpoints(horizontal_links, vertical_links)
+    dtype = index_dtype(n_nodes+2)
+
+    for a, b in sides_of(direction):
+        source, sink = n_nodes, n_nodes+1
+        pair_u = np.concatenate((u, borders[a], borders[b]), dtype=dtype)
+        pair_v = np.concatenate((v, np.full(borders[a].shape, source),
+                                    np.full(borders[b].shape, sink)), dtype=dtype)
+
+        def joined(parent: np.ndarray) -> bool:
+            return parent[source] == parent[sink]
+
+        parent = connected_components(n_nodes+2, pair_u, pair_v, until=joined)
+        if not joined(parent):
+            return False
+    return True
+
+
+def spanning_labels(labels: np.ndarray, direction: str=HORIZONTAL) -> np.ndarray:
+    borders = border_nodes(*labels.shape)
+    found = None
+    for a, b in sides_of(direction):
+        common = np.intersect1d(labels.flat[borders[a]], labels.flat[borders[b]])
+        found = common if found is None else np.intersect1d(found, common)
+    return found
@@ -0,0 +1,78 @@
+import itertools
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+class ResultStore:
+    """Directory of partial accumulators that can be appended and resumed.
+
+    ``meta.json`` describes the run and every checkpoint is written as
+    ``<shard>-<index>.npz`` holding additive arrays plus ``n_trials``.
+    Loading sums every shard, so several processes can write their own
+    shards into one store and an interrupted run loses at most the
+    trials since its last checkpoint. A checkpoint is written to a
+    temporary file and hard linked to the first free index, which fails
+    instead of overwriting when another process took that index first.
+    """
+
+    def __init__(self, path: str|Path, meta: dict=None) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta_file = self.path / 'meta.json'
+        if meta is not None:
+            meta = json.loads(json.dumps(meta))
+        if meta_file.exists():
+            self.meta = json.loads(meta_file.read_text())
+            if meta is not None and meta != self.meta:
+                raise ValueError(f"Store {self.path} holds a different run: {self.meta}")
+        else:
+            self.meta = {} if meta is None else meta
+            meta_file.write_text(json.dumps(self.meta, indent=1))
+
+    def shards(self) -> list:
+        return sorted(self.path.glob('*.npz'))
+
+    def append(self, arrays: Dict[str, np.ndarray], n_trials: int,
+               shard: str='main') -> Path:
+        handle, temporary = tempfile.mkstemp('.tmp', f'{shard}-', self.path)
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                np.savez(file, n_trials=n_trials, **arrays)
+            start = len(list(self.path.glob(f'{shard}-*.npz')))
+            for index in itertools.count(start):
+                target = self.path / f'{shard}-{index:06d}.npz'
+                try:
+                    os.link(temporary, target)
+                    break
+                except FileExistsError:
+                    continue
+        finally:
+            os.remove(temporary)
+        return target
+
+    def load(self) -> Tuple[Dict[str, np.ndarray], int]:
+        totals = {}
+        n_trials = 0
+        for shard in self.shards():
+            with np.load(shard) as archive:
+                for name in archive.files:
+                    if name == 'n_trials':
+                        n_trials += int(archive[name])
+                    elif name in totals:
+                        totals[name] = totals[name] + archive[name]
+                    else:
+                        totals[name] = archive[name]
+        return totals, n_trials
+
+    @property
+    def n_trials(self) -> int:
+        total = 0
+        for shard in self.shards():
+            with np.load(shard) as archive:
+                total += int(archive['n_trials'])
+        return total
@@ -0,0 +1,228 @@
+"""Cluster statistics of lattices too large to keep in memory.
+
+    python streaming.py lattice.perc
+    python streaming.py --random 100000 100000 --prob 0.5 --seed 1 -o sizes.npz
+
+The lattice is labeled strip by strip in the spirit of Hoshen-Kopelman:
+only the labels of the last column seen and the sizes and touched edges
+of their clusters are kept, so the memory needed grows with the height
+of the lattice, not with its area.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+from labeling import connected_components
+from lattice_file import read_lattice
+from links import PackedLinks
+from newman_ziff import SIDE_FLAGS
+from settings import *
+from spanning import BOTH, HORIZONTAL, sides_of
+
+Block = Tuple[np.ndarray, np.ndarray]
+
+
+def strip_columns(height: int) -> int:
+    """Columns per strip, about ``BATCH_NODES`` nodes but at least one column."""
+    return max(BATCH_NODES // max(height, 1), 1)
+
+
+class StripLabeler:
+    """Labels a lattice fed to it in strips of whole columns, left to right.
+
+    Clusters still reaching the last column fed are open and are only
+    known by their size and the edges they touch. Every strip is labeled
+    together with the open clusters, the clusters that do not reach its
+    last column are closed and their sizes go to ``on_sizes`` and to a
+    sparse size histogram. Apart from one strip only O(height) values are
+    kept.
+    """
+
+    def __init__(self, width: int, height: int,
+                 on_sizes: Callable[[np.ndarray], None]=None) -> None:
+        self.size = self.width, self.height = width, height
+        self.on_sizes = on_sizes
+        self.x = 0
+        # Cluster of every node of the last column, as an index into the open clusters
+        self.frontier = np.zeros(height, np.int64)
+        self.open_sizes = np.zeros(0, np.int64)
+        self.open_flags = np.zeros(0, np.uint8)
+        # Horizontal links leaving the last column
+        self.bridge = np.zeros(height, bool)
+        self.sizes = np.zeros(0, np.int64)
+        self.counts = np.zeros(0, np.int64)
+        self.joined = {pair: False for pair in sides_of(BOTH)}
+
+    @property
+    def done(self) -> bool:
+        return self.x == self.width
+
+    def add_block(self, horizontal: np.ndarray, vertical: np.ndarray) -> None:
+        """Label the next ``n`` columns, ``horizontal`` and ``vertical`` are ``(n, height)``."""
+        horizontal = np.asarray(horizontal, bool)
+        vertical = np.asarray(vertical, bool)
+        n_columns, height = horizontal.shape
+        if height != self.height or vertical.shape != horizontal.shape:
+            raise ValueError(f"Expected blocks of height {self.height}, "
+                             f"got {horizontal.shape} and {vertical.shape}")
+        if self.x + n_columns > self.width:
+            raise ValueError(f"Lattice is only {self.width} columns wide")
+
+        n_open = len(self.open_sizes)
+        n_nodes = n_columns * height
+        ys = np.flatnonzero(self.bridge)
+        inner = np.flatnonzero(horizontal[:-1])
+        down = np.flatnonzero(vertical)
+        u = np.concatenate((self.frontier[ys], inner + n_open, down + n_open))
+        v = np.concatenate((ys + n_open, inner + height + n_open, down + 1 + n_open))
+        roots = connected_components(n_open + n_nodes, u, v)
+
+        flags = np.zeros((n_columns, height), np.uint8)
+        flags[:, 0] |= SIDE_FLAGS['top']
+        flags[:, -1] |= SIDE_FLAGS['bottom']
+        if self.x == 0:
+            flags[0] |= SIDE_FLAGS['left']
+        self.x += n_columns
+        if self.done:
+            flags[-1] |= SIDE_FLAGS['right']
+        weights = np.concatenate((self.open_sizes, np.ones(n_nodes, np.int64)))
+        flags = np.concatenate((self.open_flags, flags.ravel()))
+        sizes = np.bincount(roots, weights).astype(np.int64)
+        cluster_flags = np.zeros(len(roots), np.uint8)
+        for flag in SIDE_FLAGS.values():
+            touched = np.bincount(roots, flags & flag, minlength=len(roots)) > 0
+            cluster_flags[touched] |= flag
+
+        clusters = np.flatnonzero(roots == np.arange(len(roots)))
+        for a, b in self.joined:
+            both = SIDE_FLAGS[a] | SIDE_FLAGS[b]
+            self.joined[a, b] |= bool(np.any(cluster_flags[clusters] & both == both))
+
+        last = roots[n_open + n_nodes - height:]
+        still_open = np.unique(last)
+        if self.done:
+            still_open = still_open[:0]
+        self.close(sizes[np.setdiff1d(clusters, still_open, assume_unique=True)])
+        self.frontier = np.searchsorted(still_open, last)
+        self.open_sizes = sizes[still_open]
+        self.open_flags = cluster_flags[still_open]
+        self.bridge = horizontal[-1].copy()
+
+    def close(self, sizes: np.ndarray) -> None:
+        if not len(sizes):
+            return
+        if self.on_sizes is not None:
+            self.on_sizes(sizes)
+        new_sizes, new_counts = np.unique(sizes, return_counts=True)
+        all_sizes, index = np.unique(np.concatenate((self.sizes, new_sizes)),
+                                     return_inverse=True)
+        counts = np.bincount(index, np.concatenate((self.counts, new_counts)))
+        self.sizes, self.counts = all_sizes, counts.astype(np.int64)
+
+    def is_spanning(self, direction: str=HORIZONTAL) -> bool:
+        """Whether a cluster joins the opposite borders, known once the lattice is done."""
+        return all(self.joined[pair] for pair in sides_of(direction))
+
+    @property
+    def n_clusters(self) -> int:
+        return int(np.sum(self.counts))
+
+    @property
+    def largest(self) -> int:
+        return int(self.sizes[-1]) if len(self.sizes) else 0
+
+    def size_histogram(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Sizes of the closed clusters and their counts, sorted by size.
+
+        Kept sparse: a dense histogram of a 10^5 x 10^5 lattice would
+        hold 10^10 counts, nearly all of them zero.
+        """
+        return self.sizes, self.counts
+
+
+def lattice_blocks(horizontal: np.ndarray|PackedLinks, vertical: np.ndarray|PackedLinks,
+                   n_columns: int=None) -> Iterator[Block]:
+    """Strips of links held in arrays, packed or memory mapped planes."""
+    width, height = horizontal.shape
+    n_columns = strip_columns(height) if n_columns is None else n_columns
+    for x0 in range(0, width, n_columns):
+        x1 = min(x0+n_columns, width)
+        yield horizontal[x0:x1], vertical[x0:x1]
+
+
+def random_blocks(width: int, height: int, prob: float, seed: int=None,
+                  n_columns: int=None) -> Iterator[Block]:
+    """Strips of a random lattice drawn on the fly; the lattice of a seed depends on ``n_columns``."""
+    rng = np.random.default_rng(seed)
+    n_columns = strip_columns(height) if n_columns is None else n_columns
+    for x0 in range(0, width, n_columns):
+        x1 = min(x0+n_columns, width)
+        horizontal = rng.random((x1-x0, height), np.float32) < prob
+        vertical = rng.random((x1-x0, height), np.float32) < prob
+        if x1 == width:
+            horizontal[-1] = False
+        vertical[:, -1] = False
+        yield horizontal, vertical
+
+
+def label_blocks(blocks: Iterable[Block], width: int, height: int,
+                 on_sizes: Callable[[np.ndarray], None]=None,
+                 progress: bool=False) -> StripLabeler:
+    labeler = StripLabeler(width, height, on_sizes)
+    for horizontal, vertical in tqdm(blocks, disable=not progress):
+        labeler.add_block(horizontal, vertical)
+    if not labeler.done:
+        raise ValueError(f"Lattice ended after {labeler.x} of {width} columns")
+    return labeler
+
+
+def label_file(path: str|Path, n_columns: int=None,
+               on_sizes: Callable[[np.ndarray], None]=None,
+               progress: bool=False) -> StripLabeler:
+    """Label a lattice file strip by strip, reading its memory mapped planes."""
+    _, horizontal, vertical = read_lattice(path)
+    return label_blocks(lattice_blocks(horizontal, vertical, n_columns),
+                        *horizontal.shape, on_sizes, progress)
+
+
+def label_random(width: int, height: int, prob: float, seed: int=None,
+                 n_columns: int=None, on_sizes: Callable[[np.ndarray], None]=None,
+                 progress: bool=False) -> StripLabeler:
+    return label_blocks(random_blocks(width, height, prob, seed, n_columns),
+                        width, height, on_sizes, progress)
+
+
+def main(argv: List[str]=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('lattice', nargs='?', help="lattice file written by Grid.to_file")
+    parser.add_argument('--random', nargs=2, type=int, metavar=('WIDTH', 'HEIGHT'),
+                        help="label a random lattice drawn on the fly instead")
+    parser.add_argument('--prob', type=float, default=PROBABILITY)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--columns', type=int, help="columns per strip")
+    parser.add_argument('-o', '--output', help="npz file for the cluster sizes and their counts")
+    args = parser.parse_args(argv)
+    if (args.lattice is None) == (args.random is None):
+        parser.error("give either a lattice file or --random")
+
+    if args.random is None:
+        labeler = label_file(args.lattice, args.columns, progress=True)
+    else:
+        labeler = label_random(*args.random, args.prob, args.seed, args.columns,
+                               progress=True)
+    print(f"clusters: {labeler.n_clusters}, largest: {labeler.largest}")
+    for direction in ('horizontal', 'vertical'):
+        print(f"spans {direction}: {labeler.is_spanning(direction)}")
+    if args.output is not None:
+        sizes, counts = labeler.size_histogram()
+        np.savez(args.output, sizes=sizes, counts=counts)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
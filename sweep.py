@@ -0,0 +1,255 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+from batch import GridBatch, batch_sizes
+from estimators import Z_95, RunningStats, agresti_coull_variance
+from grid import Grid
+from histogram import SizeHistogram
+from newman_ziff import NewmanZiff
+from settings import *
+from store import ResultStore
+from threshold import ThresholdSamples
+
+Work = Tuple[Tuple[int, int], float, int]
+Task = Callable[[Tuple[int, int], float, int, np.random.Generator], Any]
+
+
+def leak_count(size: Tuple[int, int], prob: float, n_trials: int,
+               rng: np.random.Generator) -> int:
+    batch = GridBatch(n_trials, *size, prob, rng)
+    return int(np.sum(batch.is_leaks()))
+
+
+def size_histogram(size: Tuple[int, int], prob: float, n_trials: int,
+                   rng: np.random.Generator) -> SizeHistogram:
+    histogram = SizeHistogram(size[0]*size[1])
+    histogram.add_batch(GridBatch(n_trials, *size, prob, rng))
+    return histogram
+
+
+def leak_stats(size: Tuple[int, int], prob: float, n_trials: int,
+               rng: np.random.Generator) -> RunningStats:
+    return RunningStats.of(GridBatch(n_trials, *size, prob, rng).is_leaks())
+
+
+def mean_size_stats(size: Tuple[int, int], prob: float, n_trials: int,
+                    rng: np.random.Generator) -> RunningStats:
+    return RunningStats.of(GridBatch(n_trials, *size, prob, rng).mean_cluster_sizes())
+
+
+def threshold_samples(size: Tuple[int, int], prob: float, n_trials: int,
+                      rng: np.random.Generator) -> ThresholdSamples:
+    """Spanning thresholds of ``n_trials`` coupled grids, ``prob`` is the first guess."""
+    samples = ThresholdSamples(*size, guess=prob)
+    samples.run(n_trials, rng)
+    return samples
+
+
+def newman_ziff_sweep(size: Tuple[int, int], prob: float, n_trials: int,
+                      rng: np.random.Generator) -> NewmanZiff:
+    """Newman-Ziff trials of the whole probability range, ``prob`` is unused."""
+    sweep = NewmanZiff(*size)
+    sweep.run(n_trials, rng)
+    return sweep
+
+
+def newman_ziff_pieces(n_trials: int, width: int, height: int) -> Iterator[int]:
+    """Pieces of about ``NEWMAN_ZIFF_BONDS`` bond steps.
+
+    Newman-Ziff trials loop over the bonds in Python instead of working
+    on batches of arrays, so pieces are kept small to spread even a
+    small lattice over all workers.
+    """
+    per_piece = max(1, NEWMAN_ZIFF_BONDS // max(2*width*height, 1))
+    for start in range(0, n_trials, per_piece):
+        yield min(per_piece, n_trials - start)
+
+
+# How work items of a task are cut into pieces, batch_sizes for the others
+PIECE_SIZES: Dict[Task, Callable[[int, int, int], Iterator[int]]] = {
+    newman_ziff_sweep: newman_ziff_pieces,
+}
+
+
+def run_piece(task: Task, size: Tuple[int, int], prob: float, n_trials: int,
+              seed: np.random.SeedSequence) -> Any:
+    return task(size, prob, n_trials, np.random.default_rng(seed))
+
+
+def root_seed(seed: int|np.random.SeedSequence=None) -> np.random.SeedSequence:
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def piece_seed(seed: int|np.random.SeedSequence, item: int, piece: int) -> np.random.SeedSequence:
+    """Seed of one piece of ``split_work`` without spawning the ones before it."""
+    root = root_seed(seed)
+    return np.random.SeedSequence(root.entropy, spawn_key=(*root.spawn_key, item, piece),
+                                  pool_size=root.pool_size)
+
+
+def split_work(work: Sequence[Work], seed: int|np.random.SeedSequence=None,
+               piece_sizes: Callable[[int, int, int], Iterator[int]]=batch_sizes) -> List[tuple]:
+    """Cut every work item into batches with their own random streams.
+
+    Seeds are spawned per item and then per batch, so a piece always
+    gets the same stream no matter how many workers share the sweep,
+    and ``piece_seed`` gives the stream of any piece directly.
+    """
+    item_seeds = root_seed(seed).spawn(len(work))
+    pieces = []
+    for index, ((size, prob, n_trials), item_seed) in enumerate(zip(work, item_seeds)):
+        counts = list(piece_sizes(n_trials, *size))
+        for n, piece_seed in zip(counts, item_seed.spawn(len(counts))):
+            pieces.append((index, size, prob, n, piece_seed))
+    return pieces
+
+
+def run_sweep(task: Task, work: Sequence[Work], n_workers: int=N_WORKERS,
+              seed: int|np.random.SeedSequence=None, progress: tqdm=None) -> list:
+    """Run ``task`` for every ``(size, prob, n_trials)`` item of ``work``.
+
+    Items are split into batches that run on a process pool, and the
+    partial results of every item are summed, so ``task`` has to return
+    something additive. ``n_workers=1`` runs everything in this process.
+    A ``progress`` bar can be passed in to share it between several runs.
+    Pieces are summed in their ``split_work`` order whatever order they
+    finish in, so float results are the same for any number of workers.
+    """
+    pieces = split_work(work, seed, PIECE_SIZES.get(task, batch_sizes))
+    results = [None] * len(work)
+
+    def collect(index: int, result: Any) -> None:
+        results[index] = result if results[index] is None else results[index] + result
+
+    total = sum(n_trials for _, _, n_trials in work)
+    with (tqdm(total=total) if progress is None else nullcontext(progress)) as progress:
+        if n_workers == 1:
+            for index, size, prob, n, piece_seed in pieces:
+                collect(index, run_piece(task, size, prob, n, piece_seed))
+                progress.update(n)
+            return results
+
+        with ProcessPoolExecutor(n_workers) as pool:
+            futures = {pool.submit(run_piece, task, size, prob, n, piece_seed): number
+                       for number, (_, size, prob, n, piece_seed) in enumerate(pieces)}
+            finished = dict()
+            next_piece = 0
+            for future in as_completed(futures):
+                number = futures[future]
+                finished[number] = future.result()
+                progress.update(pieces[number][3])
+                while next_piece in finished:
+                    collect(pieces[next_piece][0], finished.pop(next_piece))
+                    next_piece += 1
+    return results
+
+
+def run_stored(task: Task, item: Work, store: ResultStore, 
+               n_workers: int=N_WORKERS, seed: int=None,
+               checkpoint_trials: int=CHECKPOINT_TRIALS) -> Tuple[Dict[str, np.ndarray], int]:
+    """Run ``item`` in checkpoints appended to ``store``, resuming if it has some.
+
+    The result of ``task`` must provide ``to_arrays``. Every checkpoint
+    is seeded from ``seed`` and the number of trials done before it, so
+    a resumed run draws the same streams as an uninterrupted one. A
+    store that already holds more than ``n_trials`` trials is refused
+    rather than returning a larger run than asked for.
+    """
+    size, prob, n_trials = item
+    done = store.n_trials
+    if done > n_trials:
+        raise ValueError(f"Store {store.path} already holds {done} trials, "
+                         f"more than the {n_trials} asked for")
+    with tqdm(total=n_trials, initial=min(done, n_trials)) as progress:
+        while done < n_trials:
+            n = min(checkpoint_trials, n_trials - done)
+            chunk_seed = None if seed is None else (seed, done)
+            result, = run_sweep(task, [(size, prob, n)], n_workers, chunk_seed, progress)
+            store.append(result.to_arrays(), n)
+            done += n
+    return store.load()
+
+
+def run_adaptive(task: Task, points: Sequence[Tuple[Tuple[int, int], float]],
+                 target: float, budget: int, relative: bool=False,
+                 n_workers: int=N_WORKERS, seed: int=None,
+                 min_trials: int=MIN_TRIALS, z: float=Z_95,
+                 bernoulli: bool=False) -> List[RunningStats]:
+    """Sample every ``(size, prob)`` point until its mean is known to ``target``.
+
+    ``task`` must return ``RunningStats`` of one value per trial. After
+    ``min_trials`` at every point, each round asks for the trials that
+    the current variance says a point still needs for a confidence
+    interval half width of ``target`` (relative to the mean if
+    ``relative``), at most doubling its count, and every round, the
+    first one included, is scaled down to what is left of ``budget``.
+    Noisy points near the threshold get most of the trials. Only points
+    at ``p`` of 0 or 1 stop after the first round; elsewhere a sample
+    without spread keeps doubling, and for 0/1 values (``bernoulli``)
+    the variance is floored by the Agresti-Coull estimate instead.
+    """
+    stats = [RunningStats() for _ in points]
+    trivial = np.array([prob <= 0 or prob >= 1 for _, prob in points])
+    requests = np.full(len(points), min_trials, np.int64)
+    spent = 0
+    with tqdm(total=budget) as progress:
+        for round_index in itertools.count():
+            left = budget - spent
+            if requests.sum() > left:
+                requests = np.floor(requests * left / requests.sum()).astype(np.int64)
+            work = [(size, prob, int(n)) for (size, prob), n in zip(points, requests) if n > 0]
+            if not work:
+                break
+            round_seed = None if seed is None else (seed, round_index)
+            results = iter(run_sweep(task, work, n_workers, round_seed, progress))
+            for index in np.flatnonzero(requests > 0):
+                stats[index].merge(next(results))
+            spent += int(np.sum(requests))
+
+            goal = np.array([target * abs(s.mean) if relative else target for s in stats])
+            variance = np.array([s.variance if s.count > 1 else 0.0 for s in stats])
+            counts = np.array([s.count for s in stats])
+            if bernoulli:
+                floor = [agresti_coull_variance(s.count, s.mean, z) for s in stats]
+                variance = np.maximum(variance, floor)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                needed = np.where(goal > 0, np.ceil(variance * (z / goal)**2), 0)
+            needed = np.where(variance > 0, needed, 2*counts)
+            needed = np.where(trivial, 0, needed)
+            requests = np.minimum(np.maximum(needed - counts, 0), counts).astype(np.int64)
+    return stats
+
+
+def replay_trial(work: Sequence[Work], seed: int|np.random.SeedSequence,
+                 item: int, trial: int) -> Grid:
+    """Grid of one trial of a ``leak_count`` or ``size_histogram`` sweep.
+
+    Only the batch holding the trial is sampled again, from its own
+    stream, so any trial of a large sweep can be looked at in isolation.
+    Unseeded sweeps cannot be replayed.
+    """
+    if seed is None:
+        raise ValueError("Only trials of a seeded sweep can be replayed")
+    size, prob, n_trials = work[item]
+    if not 0 <= trial < n_trials:
+        raise IndexError(f"Item {item} has only {n_trials} trials")
+    start = 0
+    for piece, n in enumerate(batch_sizes(n_trials, *size)):
+        if trial < start + n:
+            break
+        start += n
+    rng = np.random.default_rng(piece_seed(seed, item, piece))
+    batch = GridBatch(n, *size, prob, rng, update_on_init=False)
+    batch.flood()
+    grid = Grid(*size, prob, update_on_init=False)
+    grid.set_links(batch.horizontal_links[trial-start].copy(),
+                   batch.vertical_links[trial-start].copy())
+    grid.find_clusters()
+    return grid
@@ -0,0 +1,22 @@
+import numpy as np
+
+
+def random_lattices(n: int, seed: int=0, max_side: int=16) -> list:
+    """``n`` random ``(horizontal, vertical)`` link planes of random size and density."""
+    rng = np.random.default_rng(seed)
+    lattices = []
+    for _ in range(n):
+        width, height = (int(side) for side in rng.integers(1, max_side, 2))
+        prob = rng.random()
+        horizontal = rng.random((width, height)) < prob
+        vertical = rng.random((width, height)) < prob
+        horizontal[-1, :] = False
+        vertical[:, -1] = False
+        lattices.append((horizontal, vertical))
+    return lattices
+
+
+def same_partition(a: np.ndarray, b: np.ndarray) -> bool:
+    """Whether two label arrays group the nodes the same way, whatever the numbers."""
+    pairs = np.unique(np.stack((a.ravel(), b.ravel())), axis=1)
+    return len(np.unique(pairs[0])) == len(np.unique(pairs[1])) == pairs.shape[1]
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from estimators import RunningStats, agresti_coull_half_width, agresti_coull_variance
+from sweep import leak_stats, mean_size_stats, run_adaptive
+
+
+def test_running_stats_merge_equals_one_pass():
+    values = np.random.default_rng(0).random(1000)
+    merged = RunningStats()
+    for part in np.array_split(values, [1, 10, 300, 301, 999]):
+        merged.merge(RunningStats.of(part))
+    whole = RunningStats.of(values)
+    assert merged.count == whole.count
+    assert np.isclose(merged.mean, whole.mean)
+    assert np.isclose(merged.m2, whole.m2)
+    assert np.isclose(merged.variance, np.var(values, ddof=1))
+    assert RunningStats().variance == float('inf')
+
+
+def test_agresti_coull_is_positive_without_spread():
+    assert agresti_coull_variance(50, 0.0) > 0
+    assert agresti_coull_variance(50, 1.0) > 0
+    assert agresti_coull_half_width(RunningStats.of(np.zeros(400))) > 0
+    assert (agresti_coull_half_width(RunningStats.of(np.zeros(400)))
+            < agresti_coull_half_width(RunningStats.of(np.zeros(100))))
+
+
+def test_budget_is_respected():
+    points = [((6, 6), prob) for prob in np.linspace(0, 1, 20)]
+    stats = run_adaptive(leak_stats, points, 0.01, 500, n_workers=1, seed=1, min_trials=10)
+    assert sum(s.count for s in stats) <= 500
+
+
+def test_budget_smaller_than_the_first_round():
+    points = [((4, 4), prob) for prob in (0.3, 0.5, 0.7)]
+    stats = run_adaptive(leak_stats, points, 0.01, 50, n_workers=1, seed=1, min_trials=100)
+    assert sum(s.count for s in stats) <= 50
+
+
+@pytest.mark.parametrize('bernoulli', [False, True])
+def test_points_without_spread_get_more_trials(bernoulli):
+    points = [((20, 20), 0.2), ((20, 20), 0.0), ((20, 20), 1.0)]
+    stats = run_adaptive(leak_stats, points, 0.01, 3000, n_workers=1, seed=2,
+                         min_trials=50, bernoulli=bernoulli)
+    assert stats[0].mean == 0
+    assert stats[0].count > 50
+    assert stats[1].count == stats[2].count == 50
+
+
+def test_noisy_points_get_most_trials():
+    points = [((8, 8), 0.1), ((8, 8), 0.5)]
+    stats = run_adaptive(mean_size_stats, points, 0.02, 4000, relative=True,
+                         n_workers=1, seed=3, min_trials=20)
+    assert stats[1].count > stats[0].count
+    for s in stats:
+        assert s.half_width() <= 0.02 * s.mean or sum(s.count for s in stats) > 3500
+
+
+def test_same_seed_same_stats():
+    points = [((5, 5), 0.5), ((5, 5), 0.6)]
+    a = run_adaptive(leak_stats, points, 0.05, 2000, n_workers=1, seed=4, min_trials=20)
+    b = run_adaptive(leak_stats, points, 0.05, 2000, n_workers=1, seed=4, min_trials=20)
+    assert [(s.count, s.mean, s.m2) for s in a] == [(s.count, s.mean, s.m2) for s in b]
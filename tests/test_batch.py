@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from batch import GridBatch, batch_sizes
+from histogram import size_counts
+from labeling import union_find_labels
+from settings import BATCH_NODES
+from spanning import DIRECTIONS, spans
+
+
+@pytest.fixture
+def batch():
+    return GridBatch(20, 7, 5, 0.5, np.random.default_rng(1))
+
+
+def per_grid(batch):
+    for horizontal, vertical in zip(batch.horizontal_links, batch.vertical_links):
+        yield horizontal, vertical, union_find_labels(horizontal, vertical)
+
+
+def test_no_links_leave_the_lattice(batch):
+    assert not batch.horizontal_links[:, -1, :].any()
+    assert not batch.vertical_links[:, :, -1].any()
+
+
+def test_clusters_stay_within_their_grid(batch):
+    labels = batch.clusters.reshape(batch.n_grids, -1)
+    owners = batch.cluster_grids[labels]
+    assert np.array_equal(owners, np.repeat(np.arange(batch.n_grids)[:, None],
+                                            labels.shape[1], axis=1))
+
+
+def test_matches_grids_labeled_one_by_one(batch):
+    histograms = batch.size_histograms()
+    for i, (horizontal, vertical, (labels, n_clusters)) in enumerate(per_grid(batch)):
+        assert batch.n_clusters()[i] == n_clusters
+        assert np.array_equal(histograms[i], size_counts(labels, batch.n_nodes))
+        sizes = np.bincount(labels.ravel())[1:]
+        assert batch.largest_cluster()[i] == sizes.max()
+        assert batch.mean_cluster_sizes()[i] == pytest.approx(np.sum(sizes**2) / batch.n_nodes)
+    assert np.array_equal(batch.size_histogram(), histograms.sum(axis=0))
+
+
+@pytest.mark.parametrize('direction', DIRECTIONS)
+def test_leaks_match_spans(batch, direction):
+    expected = [spans(h, v, direction) for h, v, _ in per_grid(batch)]
+    assert np.array_equal(batch.is_leaks(direction), expected)
+
+
+def test_batch_sizes_cover_all_grids():
+    sizes = list(batch_sizes(1000, 100, 100))
+    assert sum(sizes) == 1000
+    assert all(n * 100 * 100 <= max(BATCH_NODES, 100*100) for n in sizes)
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import cli
+from experiments import trial_counts
+from models import Cluster_sizes_model, Sizes_model
+
+
+@pytest.mark.parametrize('n_points', [1, 2, 11, 20, 101])
+def test_trial_counts_are_positive(n_points):
+    points = np.linspace(0, 1, n_points)
+    counts = trial_counts(points, 1000)
+    assert np.all(counts > 0)
+    assert np.all(np.isfinite(counts))
+    assert counts.sum() <= 1000 + n_points
+    assert counts[np.argmin(np.abs(points - 0.5))] == counts.max()
+
+
+def test_importing_cli_needs_no_gui():
+    code = ("import sys, cli; "
+            "assert not {'tkinter', 'matplotlib', 'plotter'} & set(sys.modules)")
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=Path(cli.__file__).parent)
+
+
+def test_sizes_writes_the_data(tmp_path):
+    output = tmp_path / 'sizes.npy'
+    assert cli.main(['sizes', '--sizes', '4', '6', '--probs', '0.2', '0.8', '4',
+                     '--trials', '40', '--workers', '1', '--seed', '1',
+                     '-o', str(output)]) == 0
+    model = Sizes_model()
+    model.open(output)
+    rerun = cli.compute(cli.make_parser().parse_args(
+        ['sizes', '--sizes', '4', '6', '--probs', '0.2', '0.8', '4',
+         '--trials', '40', '--workers', '1', '--seed', '1']))
+    for saved, computed in zip(model.data, rerun.data):
+        assert np.array_equal(saved, computed)
+
+
+def test_cluster_sizes_resumes_from_a_store(tmp_path):
+    args = ['cluster-sizes', '--size', '4', '4', '--trials', '30', '--workers', '1',
+            '--seed', '2', '--store', str(tmp_path / 'store'), '-o', str(tmp_path / 'cs.npz')]
+    assert cli.main(args) == 0
+    first = Cluster_sizes_model()
+    first.open(tmp_path / 'cs.npz')
+    assert cli.main(args) == 0
+    second = Cluster_sizes_model()
+    second.open(tmp_path / 'cs.npz')
+    for a, b in zip(first.data, second.data):
+        assert np.array_equal(a, b)
+
+
+def test_unknown_command_is_refused():
+    with pytest.raises(SystemExit):
+        cli.make_parser().parse_args(['nope'])
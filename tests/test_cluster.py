@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from grid import Cluster, Grid
+
+
+@pytest.fixture
+def grid():
+    return Grid(9, 7, 0.5, seed=11)
+
+
+def test_cluster_list_is_indexed_by_label(grid):
+    clusters = grid.clusters_list
+    assert len(clusters) == grid.n_clusters + 1
+    assert clusters[0] is None
+    assert clusters[-1].name == grid.n_clusters
+    assert [c.name for c in clusters[1:4]] == [1, 2, 3]
+    with pytest.raises(IndexError):
+        clusters[grid.n_clusters + 1]
+
+
+def test_cluster_is_a_view_of_the_labels(grid):
+    cluster = grid.get_cluster_on(4, 3)
+    assert isinstance(cluster, Cluster)
+    assert cluster.name == grid.clusters[4, 3]
+    xs, ys = cluster.coordinates
+    assert np.all(grid.clusters[xs, ys] == cluster.name)
+    assert cluster.nodes == set(zip(xs.tolist(), ys.tolist()))
+    assert cluster.size == cluster.area == len(cluster.nodes)
+    assert not hasattr(cluster, '__dict__')
+
+
+def test_every_node_is_in_one_cluster(grid):
+    nodes = [node for cluster in grid.clusters_list[1:] for node in cluster.nodes]
+    assert len(nodes) == len(set(nodes)) == grid.width * grid.height
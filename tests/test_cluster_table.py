@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from grid import Grid, cluster_table
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_table_matches_brute_force(seed):
+    grid = Grid(11, 8, 0.45, seed=seed)
+    table = grid.cluster_stats()
+    assert len(table) == grid.n_clusters + 1
+    for cluster in grid.clusters_list[1:]:
+        xs, ys = cluster.coordinates
+        row = table[cluster.name]
+        assert row['size'] == len(xs)
+        assert np.allclose(row['center_of_mass'], (xs.mean(), ys.mean()))
+        gyration = np.sqrt(np.mean((xs - xs.mean())**2 + (ys - ys.mean())**2))
+        assert row['radius_of_gyration'] == pytest.approx(gyration)
+        assert cluster.bounding_box == (xs.min(), ys.min(), xs.max(), ys.max())
+        touches = {edge for edge, hit in (('left', xs.min() == 0),
+                                         ('right', xs.max() == grid.width-1),
+                                         ('top', ys.min() == 0),
+                                         ('bottom', ys.max() == grid.height-1)) if hit}
+        assert cluster.touches == touches
+
+
+def test_row_zero_is_empty():
+    labels = np.array([[0, 1], [1, 2]], np.uint32)
+    table = cluster_table(labels, 2)
+    assert table['size'].tolist() == [1, 2, 1]
+    assert not table['touches'][0].any()
+    assert table['bounding_box'][0].tolist() == [0, 0, 0, 0]
+
+
+def test_table_is_built_once_per_labeling():
+    grid = Grid(6, 6, 0.5, seed=2)
+    table = grid.cluster_stats()
+    assert grid.cluster_stats() is table
+    grid.update()
+    assert grid.cluster_stats() is not table
+
+
+def test_histogram_from_table_matches_labels():
+    grid = Grid(10, 10, 0.5, seed=4)
+    before = grid.cluster_size_histogram()
+    grid.cluster_stats()
+    assert np.array_equal(grid.cluster_size_histogram(), before)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from graphics import PASSIVE_INDEX, Drawer, first_nodes
+from grid import Grid
+
+
+def drawer_of(grid):
+    drawer = Drawer(grid, seed=0)
+    drawer.set_properties(6, 2, 4)
+    return drawer
+
+
+def test_first_nodes():
+    labels = np.array([[1, 1, 2], [3, 2, 2]], np.uint32)
+    assert np.array_equal(first_nodes(labels, 3), [6, 0, 2, 3])
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_nudge_recolours_only_merged_clusters(seed):
+    grid = Grid(60, 40, 0.45, coupled=True, seed=seed)
+    drawer = drawer_of(grid)
+    drawer.compute_image()
+    old_colors = drawer.drawn_colors.copy()
+    old_labels = grid.clusters.copy()
+    old_first = first_nodes(grid.clusters, grid.n_clusters)[grid.clusters]
+
+    grid.change_probability(0.46)
+    assert grid.labels_current()
+    image = drawer.compute_image()
+    new_first = first_nodes(grid.clusters, grid.n_clusters)[grid.clusters]
+    kept = old_first == new_first
+    assert np.array_equal(drawer.drawn_colors[kept], old_colors[kept])
+    relabeled = np.mean(grid.clusters != old_labels)
+    assert np.mean(drawer.drawn_colors != old_colors) <= np.mean(~kept) < relabeled
+
+    fresh = drawer_of(grid).compute_image()
+    assert np.array_equal(np.asarray(image), np.asarray(fresh))
+
+
+def test_unlabeled_nodes_are_passive():
+    grid = Grid(10, 10, 0.5, find_all_clusters=False, seed=1)
+    drawer = drawer_of(grid)
+    drawer.compute_image()
+    assert np.all(drawer.drawn_colors == PASSIVE_INDEX)
+    assert not grid.labels_current()
+
+
+def test_overview_uses_the_cluster_colours():
+    grid = Grid(16, 16, 0.7, seed=2)
+    drawer = drawer_of(grid)
+    overview = np.asarray(drawer.compute_overview(1))
+    assert np.array_equal(overview.T, drawer.cluster_colors()[grid.clusters])
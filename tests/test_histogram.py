@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from batch import GridBatch
+from grid import Grid
+from histogram import SizeHistogram, size_counts
+
+
+def test_size_counts():
+    labels = np.array([[1, 1, 2], [3, 3, 3]])
+    assert size_counts(labels, 6).tolist() == [0, 1, 1, 1, 0, 0, 0]
+
+
+def test_grids_and_batches_add_up():
+    rng = np.random.default_rng(2)
+    batch = GridBatch(10, 5, 4, 0.5, rng)
+    histogram = SizeHistogram(20)
+    histogram.add_batch(batch)
+    grid = Grid(5, 4, 0.5, seed=1)
+    histogram.add_grid(grid)
+    histogram.add_labels(grid.clusters)
+
+    assert histogram.n_grids == 12
+    expected = batch.size_histogram() + 2 * size_counts(grid.clusters, 20)
+    assert np.array_equal(histogram.counts, expected)
+    assert histogram.n_clusters == batch.n_clusters().sum() + 2 * grid.n_clusters
+
+
+def test_every_node_is_counted_once():
+    histogram = SizeHistogram(30)
+    histogram.add_batch(GridBatch(25, 6, 5, 0.6, np.random.default_rng(0)))
+    sizes = np.arange(31)
+    assert np.sum(histogram.counts * sizes) == 25 * 30
+    assert np.sum(histogram.distribution() * sizes) == pytest.approx(1)
+
+
+def test_add_and_arrays_round_trip():
+    a, b = SizeHistogram(9), SizeHistogram(9)
+    a.add_labels(np.array([[1, 2, 2]])), b.add_labels(np.array([[1, 1, 1]]))
+    total = a + b
+    assert total.n_grids == 2
+    assert total.counts.tolist() == [0, 1, 1, 1, 0, 0, 0, 0, 0, 0]
+    again = SizeHistogram.from_arrays(total.to_arrays(), total.n_grids)
+    assert np.array_equal(again.counts, total.counts)
+    with pytest.raises(ValueError):
+        a + SizeHistogram(4)
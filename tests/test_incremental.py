@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from grid import Grid
+from helpers import random_lattices
+from labeling import bond_endpoints, merge_labels, union_find_labels
+
+
+@pytest.mark.parametrize('horizontal, vertical', random_lattices(50, seed=2))
+def test_merge_matches_relabel(horizontal, vertical):
+    rng = np.random.default_rng(3)
+    opened_horizontal = horizontal & (rng.random(horizontal.shape) < 0.5)
+    opened_vertical = vertical & (rng.random(vertical.shape) < 0.5)
+    labels, n_clusters = union_find_labels(horizontal & ~opened_horizontal,
+                                           vertical & ~opened_vertical)
+    u, v = bond_endpoints(opened_horizontal, opened_vertical)
+    merged, n_merged = merge_labels(labels, n_clusters, u, v)
+    expected, n_expected = union_find_labels(horizontal, vertical)
+    assert n_merged == n_expected
+    assert np.array_equal(merged, expected)
+
+
+@pytest.mark.parametrize('probs', [(0.3, 0.4, 0.5, 0.6), (0.6, 0.45, 0.5), (0.5, 0.5, 0.51)])
+def test_coupled_grid_matches_fresh_labels(probs):
+    grid = Grid(20, 15, probs[0], coupled=True, seed=9)
+    previous = np.array(grid.horizontal_links)
+    for prob in probs[1:]:
+        grid.change_probability(prob)
+        expected, n_expected = union_find_labels(grid.horizontal_links, grid.vertical_links)
+        assert grid.n_clusters == n_expected
+        assert np.array_equal(grid.clusters, expected)
+        if prob >= probs[0]:
+            assert np.all(grid.horizontal_links >= previous)
+        previous = np.array(grid.horizontal_links)
+
+
+def test_coupled_links_depend_only_on_the_fields():
+    grid = Grid(10, 10, 0.4, coupled=True, seed=5)
+    grid.change_probability(0.6)
+    fresh = Grid(10, 10, 0.6, coupled=True, seed=5)
+    assert np.array_equal(grid.horizontal_links, fresh.horizontal_links)
+    assert np.array_equal(grid.vertical_links, fresh.vertical_links)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from grid import Grid
+from helpers import random_lattices, same_partition
+from labeling import LABELERS, dfs_labels, union_find_labels
+
+
+@pytest.mark.parametrize('horizontal, vertical', random_lattices(50))
+def test_union_find_matches_dfs(horizontal, vertical):
+    labels, n_clusters = union_find_labels(horizontal, vertical)
+    expected, n_expected = dfs_labels(horizontal, vertical)
+    assert n_clusters == n_expected
+    assert same_partition(labels, expected)
+
+
+def test_labels_are_numbered_from_one_without_gaps():
+    labels, n_clusters = union_find_labels(*random_lattices(1, seed=5)[0])
+    assert labels.min() == 1
+    assert np.array_equal(np.unique(labels), np.arange(1, n_clusters+1))
+
+
+def test_known_lattice():
+    horizontal = np.array([[1, 0, 0], [0, 0, 0]], bool)
+    vertical = np.array([[0, 1, 0], [0, 0, 0]], bool)
+    labels, n_clusters = union_find_labels(horizontal, vertical)
+    assert n_clusters == 4
+    assert labels[0, 0] == labels[1, 0]
+    assert labels[0, 1] == labels[0, 2]
+    assert labels[0, 0] != labels[0, 1] != labels[1, 1]
+
+
+@pytest.mark.parametrize('labeler', list(LABELERS))
+def test_grid_labelers_agree(labeler):
+    grid = Grid(12, 9, 0.5, labeler=labeler, seed=3)
+    expected, _ = dfs_labels(grid.horizontal_links, grid.vertical_links)
+    assert same_partition(grid.clusters, expected)
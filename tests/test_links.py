@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+import links
+from grid import Grid
+from labeling import bond_endpoints, connected_components, index_dtype
+from links import PackedLinks, random_links
+from spanning import spans
+
+SHAPES = [(1, 1), (3, 5), (8, 8), (13, 7), (40, 3)]
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(links, 'BATCH_NODES', 16)
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_packed_matches_unpacked(shape, small_chunks):
+    plane = np.random.default_rng(0).random(shape) < 0.5
+    packed = PackedLinks.pack(plane)
+    assert packed.shape == plane.shape
+    assert packed.nbytes == -(-plane.size // 8)
+    assert np.array_equal(np.asarray(packed), plane)
+    assert np.array_equal(packed.flatnonzero(), np.flatnonzero(plane))
+    assert packed.flatnonzero(np.int32).dtype == np.int32
+    for x0 in range(shape[0]):
+        for x1 in range(x0, shape[0]+1):
+            assert np.array_equal(packed.rows(x0, x1), plane[x0:x1])
+    assert np.array_equal(packed[-1], plane[-1])
+    assert np.array_equal(packed[1:, -1], plane[1:, -1])
+    assert np.array_equal(packed[::2], plane[::2])
+    assert packed[0, 0] == plane[0, 0]
+    with pytest.raises(IndexError):
+        packed[shape[0]]
+
+
+def test_setitem_repacks():
+    plane = np.zeros((5, 6), bool)
+    packed = PackedLinks.pack(plane)
+    packed[2, 3] = True
+    packed[-1] = True
+    plane[2, 3] = True
+    plane[-1] = True
+    assert np.array_equal(np.asarray(packed), plane)
+
+
+@pytest.mark.parametrize('axis', [0, 1])
+def test_random_links_packed_equals_unpacked(axis, small_chunks):
+    unpacked = random_links(np.random.default_rng(1), (21, 9), 0.5, axis)
+    packed = random_links(np.random.default_rng(1), (21, 9), 0.5, axis, packed=True)
+    assert np.array_equal(np.asarray(packed), unpacked)
+    assert not (unpacked[-1].any() if axis == 0 else unpacked[:, -1].any())
+
+
+def test_packed_grid_labels_like_unpacked():
+    for seed in range(5):
+        grid = Grid(17, 11, 0.5, seed=seed)
+        packed = Grid(17, 11, 0.5, seed=seed, packed=True)
+        assert isinstance(packed.horizontal_links, PackedLinks)
+        assert np.array_equal(packed.clusters, grid.clusters)
+        for direction in ('horizontal', 'vertical', 'both'):
+            assert packed.is_leaks(direction) == grid.is_leaks(direction)
+
+
+def test_int32_indices():
+    assert index_dtype(2**31 - 1) == np.int32
+    assert index_dtype(2**31) == np.int64
+    plane = np.random.default_rng(2).random((9, 9)) < 0.5
+    plane[-1] = plane[:, -1] = False
+    for links_ in (plane, PackedLinks.pack(plane)):
+        u, v = bond_endpoints(links_, links_)
+        assert u.dtype == v.dtype == np.int32
+    roots = connected_components(81, u, v)
+    assert roots.dtype == np.int32
+    assert spans(plane, plane) == spans(PackedLinks.pack(plane), PackedLinks.pack(plane))
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from batch import GridBatch
+from newman_ziff import NewmanZiff, binomial_weights
+from sweep import newman_ziff_pieces
+
+PROBS = [0.2, 0.45, 0.5, 0.7]
+
+
+def sweep(n_trials, seed, width=6, height=5, track_histogram=False):
+    result = NewmanZiff(width, height, track_histogram=track_histogram)
+    result.run(n_trials, np.random.default_rng(seed))
+    return result
+
+
+def test_binomial_weights_are_distributions():
+    weights = binomial_weights(12, [0, 0.3, 0.5, 1])
+    assert np.allclose(weights.sum(axis=1), 1)
+    assert weights[0, 0] == 1 and weights[-1, -1] == 1
+    assert np.isclose(weights[1] @ np.arange(13), 12 * 0.3)
+
+
+def test_matches_monte_carlo():
+    observed = sweep(3000, seed=1).at(PROBS)
+    for i, prob in enumerate(PROBS):
+        batch = GridBatch(6000, 6, 5, prob, np.random.default_rng(2 + i))
+        samples = {
+            'mean_size': batch.mean_cluster_sizes(),
+            'largest': batch.largest_cluster(),
+            'n_clusters': batch.n_clusters(),
+            'spanning': batch.is_leaks().astype(float),
+        }
+        for name, values in samples.items():
+            error = np.std(values) * np.sqrt(1/len(values) + 1/3000)
+            assert abs(observed[name][i] - np.mean(values)) <= 5*error + 1e-9, name
+
+
+def test_sparse_histogram_is_consistent():
+    result = sweep(50, seed=3, track_histogram=True)
+    histogram = result.histogram()
+    sizes = np.arange(result.n_nodes+1)
+    assert np.allclose(histogram @ sizes, result.n_nodes)
+    assert np.allclose(histogram.sum(axis=1), result.per_bonds()['n_clusters'])
+    weights = binomial_weights(result.n_bonds, PROBS)
+    assert np.allclose(result.histogram_at(weights), weights @ histogram)
+    assert np.allclose(result.at(PROBS)['histogram'], weights @ histogram)
+
+
+def test_histogram_matches_monte_carlo():
+    observed = sweep(2000, seed=4, track_histogram=True).at([0.5])['histogram'][0]
+    batch = GridBatch(4000, 6, 5, 0.5, np.random.default_rng(5))
+    expected = batch.size_histogram() / batch.n_grids
+    assert np.allclose(observed, expected, atol=0.1)
+
+
+def test_add_equals_one_run():
+    a = sweep(20, seed=6, track_histogram=True)
+    b = sweep(30, seed=7, track_histogram=True)
+    total = a + b
+    assert total.n_trials == 50
+    for name, values in total.totals.items():
+        assert np.array_equal(values, a.totals[name] + b.totals[name])
+    expected = (a.histogram() * a.n_trials + b.histogram() * b.n_trials) / 50
+    assert np.allclose(total.histogram(), expected)
+
+
+def test_add_refuses_other_lattices():
+    with pytest.raises(ValueError):
+        NewmanZiff(4, 4) + NewmanZiff(4, 5)
+
+
+@pytest.mark.parametrize('n_trials, width, height', [(0, 4, 4), (1, 4, 4), (1000, 4, 4), (7, 300, 300)])
+def test_pieces_cover_the_trials(n_trials, width, height):
+    pieces = list(newman_ziff_pieces(n_trials, width, height))
+    assert sum(pieces) == n_trials
+    assert all(piece > 0 for piece in pieces)
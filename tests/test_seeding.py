@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from tqdm import tqdm
+
+from graphics import Drawer
+from grid import Grid
+from lattice_file import NO_SEED, read_header
+from sweep import replay_trial, run_sweep, size_histogram
+
+WORK = [((5, 4), 0.5, 120), ((3, 6), 0.6, 50)]
+
+
+def saved_seed(grid, path):
+    grid.to_file(path)
+    return int(read_header(path)['seed'])
+
+
+def test_same_seed_same_grid():
+    a, b, c = Grid(12, 9, 0.5, seed=1), Grid(12, 9, 0.5, seed=1), Grid(12, 9, 0.5, seed=2)
+    assert np.array_equal(a.horizontal_links, b.horizontal_links)
+    assert np.array_equal(a.vertical_links, b.vertical_links)
+    assert not np.array_equal(a.horizontal_links, c.horizontal_links)
+
+
+def test_same_seed_same_palette():
+    grid = Grid(4, 4, seed=0)
+    assert np.array_equal(Drawer(grid, seed=3).palette, Drawer(grid, seed=3).palette)
+
+
+def test_file_keeps_the_seed_of_the_first_flood(tmp_path):
+    path = tmp_path / 'lattice.perc'
+    grid = Grid(6, 6, 0.5, seed=5)
+    assert saved_seed(grid, path) == 5
+    grid.update()
+    assert saved_seed(grid, path) == NO_SEED
+
+
+def test_coupled_reopening_keeps_the_seed(tmp_path):
+    grid = Grid(6, 6, 0.4, coupled=True, seed=5)
+    grid.change_probability(0.6)
+    grid.change_probability(0.5)
+    assert saved_seed(grid, tmp_path / 'lattice.perc') == 5
+
+
+@pytest.mark.parametrize('edit', ['set_links', 'in_place'])
+def test_edited_links_drop_the_seed(tmp_path, edit):
+    grid = Grid(6, 6, 0.5, seed=5)
+    if edit == 'set_links':
+        grid.set_links(np.ones((6, 6), bool), np.zeros((6, 6), bool))
+    else:
+        grid.horizontal_links[0, 0] = not grid.horizontal_links[0, 0]
+        grid.links_changed()
+    assert grid.seed is None
+    assert saved_seed(grid, tmp_path / 'lattice.perc') == NO_SEED
+
+
+def test_replayed_trials_add_up_to_the_sweep():
+    histograms = run_sweep(size_histogram, WORK, 1, 11, tqdm(disable=True))
+    for item, (size, prob, n_trials) in enumerate(WORK):
+        counts = sum(replay_trial(WORK, 11, item, trial).cluster_size_histogram()
+                     for trial in range(n_trials))
+        assert np.array_equal(counts, histograms[item].counts)
+
+
+def test_replay_needs_a_seeded_sweep():
+    with pytest.raises(ValueError):
+        replay_trial(WORK, None, 0, 0)
+    with pytest.raises(IndexError):
+        replay_trial(WORK, 11, 1, 50)
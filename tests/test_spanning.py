@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from grid import Grid
+from helpers import random_lattices
+from labeling import union_find_labels
+from spanning import BOTH, DIRECTIONS, HORIZONTAL, VERTICAL, spanning_labels, spans
+
+
+@pytest.mark.parametrize('horizontal, vertical', random_lattices(50, seed=1))
+def test_spans_matches_border_labels(horizontal, vertical):
+    labels, _ = union_find_labels(horizontal, vertical)
+    for direction in DIRECTIONS:
+        expected = len(spanning_labels(labels, direction)) > 0
+        assert spans(horizontal, vertical, direction) == expected
+
+
+def test_straight_paths():
+    horizontal = np.zeros((4, 3), bool)
+    vertical = np.zeros((4, 3), bool)
+    horizontal[:-1, 1] = True
+    assert spans(horizontal, vertical, HORIZONTAL)
+    assert not spans(horizontal, vertical, VERTICAL)
+    vertical[2, :-1] = True
+    assert spans(horizontal, vertical, VERTICAL)
+    assert spans(horizontal, vertical, BOTH)
+
+
+def test_unknown_direction():
+    with pytest.raises(ValueError):
+        spans(np.zeros((2, 2), bool), np.zeros((2, 2), bool), 'diagonal')
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_spanning_cluster_touches_both_sides(seed):
+    grid = Grid(15, 15, 0.55, seed=seed)
+    cluster = grid.spanning_cluster()
+    assert (cluster is not None) == grid.is_leaks()
+    if cluster is not None:
+        assert {'left', 'right'} <= cluster.touches
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from store import ResultStore
+from sweep import run_stored, size_histogram
+
+ITEM = ((5, 4), 0.5, 300)
+
+
+def test_load_sums_the_shards(tmp_path):
+    store = ResultStore(tmp_path)
+    store.append({'counts': np.array([1, 2])}, 10)
+    store.append({'counts': np.array([3, 4])}, 5, shard='other')
+    store.append({'counts': np.array([0, 1])}, 1)
+    totals, n_trials = store.load()
+    assert n_trials == store.n_trials == 16
+    assert np.array_equal(totals['counts'], [4, 7])
+    assert len(store.shards()) == 3
+
+
+def test_concurrent_appends_keep_every_shard(tmp_path):
+    store = ResultStore(tmp_path)
+    with ThreadPoolExecutor(8) as pool:
+        targets = list(pool.map(lambda i: store.append({'counts': np.array([i])}, 1),
+                                range(40)))
+    assert len(set(targets)) == 40
+    totals, n_trials = store.load()
+    assert n_trials == 40
+    assert totals['counts'][0] == sum(range(40))
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_meta_mismatch_is_refused(tmp_path):
+    ResultStore(tmp_path, {'size': (4, 4), 'prob': 0.5})
+    assert ResultStore(tmp_path, {'size': [4, 4], 'prob': 0.5}).meta['prob'] == 0.5
+    with pytest.raises(ValueError):
+        ResultStore(tmp_path, {'size': (4, 4), 'prob': 0.6})
+
+
+def test_resumed_run_matches_an_uninterrupted_one(tmp_path):
+    whole, n_whole = run_stored(size_histogram, ITEM, ResultStore(tmp_path / 'whole'),
+                                n_workers=1, seed=7, checkpoint_trials=100)
+    store = ResultStore(tmp_path / 'resumed')
+    size, prob, n_trials = ITEM
+    run_stored(size_histogram, (size, prob, 200), store, n_workers=1, seed=7,
+               checkpoint_trials=100)
+    resumed, n_resumed = run_stored(size_histogram, ITEM, store, n_workers=1, seed=7,
+                                    checkpoint_trials=100)
+    assert n_whole == n_resumed == n_trials
+    assert np.array_equal(whole['counts'], resumed['counts'])
+
+
+def test_larger_store_is_refused(tmp_path):
+    store = ResultStore(tmp_path)
+    run_stored(size_histogram, ITEM, store, n_workers=1, seed=1)
+    size, prob, _ = ITEM
+    with pytest.raises(ValueError):
+        run_stored(size_histogram, (size, prob, 100), store, n_workers=1, seed=1)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+import streaming
+from grid import Grid
+from helpers import random_lattices
+from streaming import (StripLabeler, label_blocks, label_file, label_random,
+                       lattice_blocks, random_blocks)
+
+
+def grid_of(horizontal, vertical):
+    grid = Grid(*horizontal.shape, update_on_init=False)
+    grid.set_links(horizontal, vertical)
+    grid.find_clusters()
+    return grid
+
+
+def sparse_histogram(grid):
+    counts = grid.cluster_size_histogram()
+    sizes = np.flatnonzero(counts)
+    return sizes, counts[sizes]
+
+
+@pytest.mark.parametrize('n_columns', [1, 3, 7])
+@pytest.mark.parametrize('horizontal, vertical', random_lattices(15, seed=5))
+def test_strips_match_the_grid(horizontal, vertical, n_columns):
+    grid = grid_of(horizontal, vertical)
+    labeler = label_blocks(lattice_blocks(horizontal, vertical, n_columns), *grid.size)
+    sizes, counts = labeler.size_histogram()
+    expected_sizes, expected_counts = sparse_histogram(grid)
+    assert np.array_equal(sizes, expected_sizes)
+    assert np.array_equal(counts, expected_counts)
+    assert labeler.n_clusters == grid.n_clusters
+    assert labeler.largest == grid.cluster_stats()['size'].max()
+    for direction in ('horizontal', 'vertical', 'both'):
+        assert labeler.is_spanning(direction) == grid.is_leaks(direction)
+
+
+def test_closed_sizes_are_reported():
+    seen = []
+    labeler = label_random(30, 8, 0.5, seed=1, n_columns=4, on_sizes=seen.append)
+    sizes = np.concatenate(seen)
+    assert sizes.sum() == 30 * 8
+    assert len(sizes) == labeler.n_clusters
+
+
+def test_label_file(tmp_path):
+    grid = Grid(25, 9, 0.5, seed=2)
+    path = tmp_path / 'lattice.perc'
+    grid.to_file(path)
+    labeler = label_file(path, n_columns=8)
+    sizes, counts = labeler.size_histogram()
+    expected_sizes, expected_counts = sparse_histogram(grid)
+    assert np.array_equal(sizes, expected_sizes)
+    assert np.array_equal(counts, expected_counts)
+
+
+def test_random_blocks_cover_the_lattice():
+    blocks = list(random_blocks(23, 6, 0.5, seed=3, n_columns=5))
+    assert sum(len(horizontal) for horizontal, _ in blocks) == 23
+    assert not blocks[-1][0][-1].any()
+    assert not any(vertical[:, -1].any() for _, vertical in blocks)
+    labeler = label_blocks(iter(blocks), 23, 6)
+    sizes, counts = labeler.size_histogram()
+    assert sizes @ counts == 23 * 6
+
+
+def test_bad_blocks_are_refused():
+    labeler = StripLabeler(4, 3)
+    with pytest.raises(ValueError):
+        labeler.add_block(np.zeros((2, 4), bool), np.zeros((2, 4), bool))
+    with pytest.raises(ValueError):
+        labeler.add_block(np.zeros((5, 3), bool), np.zeros((5, 3), bool))
+    with pytest.raises(ValueError):
+        label_blocks(random_blocks(4, 3, 0.5, seed=0, n_columns=2), 6, 3)
+
+
+def test_main_saves_the_sparse_histogram(tmp_path):
+    output = tmp_path / 'sizes.npz'
+    assert streaming.main(['--random', '12', '5', '--seed', '4', '-o', str(output)]) == 0
+    with np.load(output) as data:
+        assert data['sizes'] @ data['counts'] == 12 * 5
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from sweep import leak_count, leak_stats, run_sweep, size_histogram, split_work
+
+WORK = [((6, 6), 0.5, 300), ((4, 9), 0.45, 200)]
+
+
+def quiet():
+    from tqdm import tqdm
+    return tqdm(disable=True)
+
+
+def test_split_work_covers_every_trial():
+    pieces = split_work(WORK, 1)
+    for index, (size, prob, n_trials) in enumerate(WORK):
+        assert sum(n for item, _, _, n, _ in pieces if item == index) == n_trials
+
+
+@pytest.mark.parametrize('n_workers', [2, 3])
+def test_same_seed_same_result_for_any_worker_count(n_workers, monkeypatch):
+    monkeypatch.setattr('batch.BATCH_NODES', 6*6*40)
+    serial = run_sweep(leak_stats, WORK, 1, 7, quiet())
+    parallel = run_sweep(leak_stats, WORK, n_workers, 7, quiet())
+    for a, b in zip(serial, parallel):
+        assert (a.count, a.mean, a.m2) == (b.count, b.mean, b.m2)
+
+    serial = run_sweep(size_histogram, WORK, 1, 7, quiet())
+    parallel = run_sweep(size_histogram, WORK, n_workers, 7, quiet())
+    for a, b in zip(serial, parallel):
+        assert np.array_equal(a.counts, b.counts)
+
+
+def test_seed_reproduces_and_differs():
+    assert run_sweep(leak_count, WORK, 1, 3, quiet()) == run_sweep(leak_count, WORK, 1, 3, quiet())
+    assert run_sweep(leak_count, WORK, 1, 3, quiet()) != run_sweep(leak_count, WORK, 1, 4, quiet())
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from grid import Grid
+from lattice_file import NO_SEED, read_header, read_lattice, write_lattice
+from links import PackedLinks
+
+
+def test_text_round_trip():
+    grid = Grid(13, 7, 0.5, seed=1)
+    text = grid.to_text()
+    assert text.splitlines()[0] == ''.join(
+        str(int(grid.horizontal_links[x, 0]) + 2*int(grid.vertical_links[x, 0]))
+        for x in range(13))
+    loaded = Grid.from_text(text)
+    assert loaded.size == grid.size
+    assert np.array_equal(loaded.horizontal_links, grid.horizontal_links)
+    assert np.array_equal(loaded.vertical_links, grid.vertical_links)
+    loaded.update_clusters()
+    assert np.array_equal(loaded.clusters, grid.clusters)
+
+
+def test_from_text_clears_the_edges():
+    with pytest.warns(UserWarning, match='bottom'):
+        grid = Grid.from_text('00\n22')
+    assert not grid.vertical_links.any()
+    with pytest.warns(UserWarning, match='right'):
+        grid = Grid.from_text('011\n001')
+    assert not grid.horizontal_links[-1].any()
+    assert grid.horizontal_links[1, 0]
+
+
+def test_from_text_refuses_ragged_rows():
+    with pytest.raises(ValueError):
+        Grid.from_text('00\n000')
+
+
+@pytest.mark.parametrize('packed', [False, True])
+def test_file_round_trip(tmp_path, packed):
+    grid = Grid(11, 9, 0.45, seed=3, packed=packed)
+    path = tmp_path / 'lattice.perc'
+    grid.to_file(path)
+    header = read_header(path)
+    assert (header['width'], header['height']) == (11, 9)
+    assert header['prob'] == 0.45
+    assert header['seed'] == 3
+    loaded = Grid.from_file(path, packed=packed)
+    assert loaded.prob == 0.45
+    assert np.array_equal(np.asarray(loaded.horizontal_links), np.asarray(grid.horizontal_links))
+    assert np.array_equal(np.asarray(loaded.vertical_links), np.asarray(grid.vertical_links))
+    loaded.update_clusters()
+    assert np.array_equal(loaded.clusters, grid.clusters)
+
+
+def test_file_is_bit_packed(tmp_path):
+    rng = np.random.default_rng(4)
+    horizontal, vertical = rng.random((2, 33, 17)) < 0.5
+    path = tmp_path / 'lattice.perc'
+    write_lattice(path, horizontal, vertical, 0.5)
+    assert path.stat().st_size == read_header(path).nbytes + 2 * -(-33*17 // 8)
+    header, packed_horizontal, packed_vertical = read_lattice(path)
+    assert header['seed'] == NO_SEED
+    assert isinstance(packed_horizontal, PackedLinks)
+    assert np.array_equal(np.asarray(packed_horizontal), horizontal)
+    assert np.array_equal(np.asarray(packed_vertical), vertical)
+
+
+def test_not_a_lattice_file(tmp_path):
+    path = tmp_path / 'other.perc'
+    path.write_bytes(b'NOPE' + bytes(40))
+    with pytest.raises(ValueError):
+        read_header(path)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from tqdm import tqdm
+
+from grid import Grid
+from sweep import run_sweep, threshold_samples
+from threshold import ThresholdSamples, fss_fit, leaks_at, spanning_threshold
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('direction', ['horizontal', 'vertical', 'both'])
+def test_threshold_splits_leaking_from_not(seed, direction):
+    grid = Grid(12, 10, find_all_clusters=False, coupled=True, seed=seed)
+    tol = 1e-3
+    threshold = spanning_threshold(grid, direction, 0.45, 0.55, tol)
+    assert leaks_at(grid, min(threshold + tol, 1.0), direction)
+    assert not leaks_at(grid, max(threshold - tol, 0.0), direction)
+
+
+def test_samples_estimate_and_leak_chance():
+    samples = ThresholdSamples(16, 16, guess=0.5)
+    samples.run(60, np.random.default_rng(1))
+    assert len(samples.thresholds) == 60
+    median, low, high = samples.estimate()
+    assert low <= median <= high
+    assert 0.4 < median < 0.6
+    chance = samples.leak_chance([0.0, median, 1.0])
+    assert chance[0] == 0 and chance[-1] == 1
+    assert 0.4 <= chance[1] <= 0.6
+    assert np.all(np.isnan(ThresholdSamples(4, 4).estimate()))
+
+
+def test_samples_add_up():
+    a = run_sweep(threshold_samples, [((8, 8), 0.5, 10)], 1, 2, tqdm(disable=True))[0]
+    b = ThresholdSamples(8, 8) + ThresholdSamples(8, 8)
+    assert len((a + b).thresholds) == 10
+    with pytest.raises(ValueError):
+        a + ThresholdSamples(8, 9)
+
+
+@pytest.mark.parametrize('nu', [4/3, None])
+def test_fss_fit_recovers_the_parameters(nu):
+    sizes = np.array([16, 32, 64, 128, 256, 512])
+    thresholds = 0.5 + 0.3 * sizes**(-3/4)
+    fit = fss_fit(sizes, thresholds, np.full(len(sizes), 1e-4), nu)
+    assert fit['p_c'] == pytest.approx(0.5, abs=1e-3)
+    assert fit['a'] == pytest.approx(0.3, rel=0.05)
+    assert fit['nu'] == pytest.approx(4/3, abs=0.02)
+    assert fit['dof'] == 4
@@ -0,0 +1,72 @@
+import numpy as np
+
+from graphics import Drawer
+from grid import Grid
+from models import Cluster_count_model
+
+
+def test_update_bumps_every_version():
+    grid = Grid(8, 8, 0.5, seed=0)
+    links, labels = grid.links_version, grid.labels_version
+    assert grid.labels_current()
+    grid.update()
+    assert grid.links_version > links
+    assert grid.labels_version > labels
+    assert grid.labels_current()
+
+
+def test_set_links_makes_the_labels_stale():
+    grid = Grid(8, 8, 0.5, seed=0)
+    labels = grid.labels_version
+    horizontal = np.ones((8, 8), bool)
+    horizontal[-1] = False
+    grid.set_links(horizontal, np.zeros((8, 8), bool))
+    assert not grid.labels_current()
+    assert grid.labels_version == labels
+    grid.update_clusters()
+    assert grid.labels_current()
+    assert grid.labels_version > labels
+    assert grid.n_clusters == 8
+
+
+def test_update_clusters_skips_current_labels():
+    grid = Grid(8, 8, 0.5, seed=0)
+    labels = grid.labels_version
+    grid.update_clusters()
+    assert grid.labels_version == labels
+    stats = grid.cluster_stats()
+    assert grid.cluster_stats() is stats
+
+
+def test_leaks_are_forgotten_when_links_change():
+    grid = Grid(6, 6, 0.5, find_all_clusters=False, seed=0)
+    grid.set_links(np.zeros((6, 6), bool), np.zeros((6, 6), bool))
+    assert not grid.is_leaks()
+    horizontal = np.ones((6, 6), bool)
+    horizontal[-1] = False
+    grid.horizontal_links[:] = horizontal
+    assert not grid.is_leaks()
+    grid.links_changed()
+    assert grid.is_leaks()
+
+
+def test_drawer_keeps_the_image_of_an_unchanged_grid():
+    grid = Grid(12, 9, 0.5, seed=1)
+    drawer = Drawer(grid, seed=0)
+    drawer.set_properties(6, 2, 4)
+    image = drawer.compute_image()
+    assert drawer.compute_image() is image
+    grid.update()
+    assert drawer.compute_image() is not image
+
+
+def test_cluster_count_is_current_until_the_labels_change():
+    grid = Grid(10, 10, 0.5, seed=2)
+    model = Cluster_count_model(grid)
+    assert not model.current()
+    model.calculate()
+    assert model.current()
+    sizes, counts = model.data
+    assert counts @ sizes <= 100
+    grid.update()
+    assert not model.current()
@@ -0,0 +1,129 @@
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from estimators import Z_95
+from grid import Grid
+from settings import *
+from spanning import HORIZONTAL
+
+NU = 4 / 3
+
+
+def leaks_at(grid: Grid, prob: float, direction: str=HORIZONTAL) -> bool:
+    grid.change_probability(prob)
+    return grid.is_leaks(direction)
+
+
+def spanning_threshold(grid: Grid, direction: str=HORIZONTAL, low: float=0.0,
+                       high: float=1.0, tol: float=THRESHOLD_TOL) -> float:
+    """Smallest ``p`` within ``tol`` at which a coupled grid leaks.
+
+    The uniform fields of the grid stay fixed while ``p`` changes, and
+    leaking only grows with ``p`` on fixed fields, so bisection works.
+    ``low`` and ``high`` are a first guess of the bracket and are widened
+    to 0 and 1 when they turn out wrong.
+    """
+    if low > 0 and leaks_at(grid, low, direction):
+        low = 0.0
+    if high < 1 and not leaks_at(grid, high, direction):
+        high = 1.0
+    while high - low > tol:
+        middle = (low + high) / 2
+        if leaks_at(grid, middle, direction):
+            high = middle
+        else:
+            low = middle
+    return (low + high) / 2
+
+
+class ThresholdSamples:
+    """Spanning thresholds of independent coupled lattices of one size.
+
+    Every sample is a coupled grid bisected for the ``p`` at which it
+    starts to leak, so one pair of uniform fields answers for every
+    ``p`` at once. The bracket of each new sample is centered on the
+    median of the previous ones (or on ``guess`` at first) and as wide
+    as their spread, a Robbins-Monro like update that keeps the
+    bisection short. The leak chance at ``p`` is the share of
+    thresholds below it, and ``p_c(L)`` is their median.
+    """
+
+    def __init__(self, width: int, height: int, direction: str=HORIZONTAL,
+                 tol: float=THRESHOLD_TOL, guess: float=None) -> None:
+        self.size = self.width, self.height = width, height
+        self.direction = direction
+        self.tol = tol
+        self.guess = guess
+        self.thresholds = np.zeros(0)
+
+    def bracket(self) -> Tuple[float, float]:
+        if len(self.thresholds) < 2:
+            if self.guess is None:
+                return 0.0, 1.0
+            center, spread = self.guess, THRESHOLD_GUESS_WIDTH
+        else:
+            center = np.median(self.thresholds)
+            spread = 3 * np.std(self.thresholds) + self.tol
+        return max(center - spread, 0.0), min(center + spread, 1.0)
+
+    def sample(self, rng: np.random.Generator) -> float:
+        grid = Grid(*self.size, find_all_clusters=False, coupled=True, seed=rng)
+        low, high = self.bracket()
+        threshold = spanning_threshold(grid, self.direction, low, high, self.tol)
+        self.thresholds = np.append(self.thresholds, threshold)
+        return threshold
+
+    def run(self, n_samples: int, rng: np.random.Generator=None) -> None:
+        rng = np.random.default_rng() if rng is None else rng
+        for _ in range(n_samples):
+            self.sample(rng)
+
+    def leak_chance(self, probs: Sequence[float]) -> np.ndarray:
+        return np.searchsorted(np.sort(self.thresholds), probs, side='right') / len(self.thresholds)
+
+    def estimate(self, z: float=Z_95) -> Tuple[float, float, float]:
+        """Median threshold and the order statistic bounds of its confidence interval."""
+        thresholds = np.sort(self.thresholds)
+        n = len(thresholds)
+        if not n:
+            return np.nan, np.nan, np.nan
+        half = z * np.sqrt(n) / 2
+        low = int(max(np.floor(n/2 - half), 0))
+        high = int(min(np.ceil(n/2 + half), n-1))
+        return float(np.median(thresholds)), float(thresholds[low]), float(thresholds[high])
+
+    def __add__(self, other: 'ThresholdSamples') -> 'ThresholdSamples':
+        if (other.size, other.direction) != (self.size, self.direction):
+            raise ValueError("Cant add thresholds of different lattices")
+        result = ThresholdSamples(*self.size, self.direction,
+                                  min(self.tol, other.tol), self.guess)
+        result.thresholds = np.concatenate((self.thresholds, other.thresholds))
+        return result
+
+
+def fss_fit(sizes: Sequence[int], thresholds: Sequence[float], errors: Sequence[float],
+            nu: float=NU) -> Dict[str, float]:
+    """Fit ``p_c(L) = p_c + a * L**(-1/nu)`` by weighted least squares.
+
+    With ``nu=None`` the exponent is fitted too, by scanning it for the
+    smallest chi-square.
+    """
+    sizes = np.asarray(sizes, float)
+    thresholds = np.asarray(thresholds, float)
+    weights = 1 / np.maximum(np.asarray(errors, float), 1e-12)**2
+
+    def fit(nu: float) -> Tuple[np.ndarray, np.ndarray, float]:
+        design = np.stack((np.ones_like(sizes), sizes**(-1/nu)), axis=1)
+        normal = design.T @ (weights[:, np.newaxis] * design)
+        covariance = np.linalg.inv(normal)
+        params = covariance @ (design.T @ (weights * thresholds))
+        chi2 = float(np.sum(weights * (design @ params - thresholds)**2))
+        return params, covariance, chi2
+
+    if nu is None:
+        candidates = np.linspace(0.5, 3, 251)
+        nu = float(candidates[np.argmin([fit(candidate)[2] for candidate in candidates])])
+    (p_c, a), covariance, chi2 = fit(nu)
+    return {'p_c': float(p_c), 'p_c_error': float(np.sqrt(covariance[0, 0])),
+            'a': float(a), 'nu': nu, 'chi2': chi2, 'dof': len(sizes) - 2}
@@ -0,0 +1,70 @@
+import queue
+import threading
+from typing import Any, Callable
+
+from settings import *
+
+
+class Background_worker:
+    """Runs a job on a background thread on behalf of a Tk widget.
+
+    ``request`` never blocks: requests that arrive while the job is
+    running collapse into a single rerun, so only the latest state gets
+    computed. Results are picked up by polling with ``after`` and handed
+    to ``on_result`` on the Tk thread, and ``on_idle`` is called once
+    nothing is left to do.
+    """
+
+    def __init__(self, widget, job: Callable[[], Any],
+                 on_result: Callable[[Any], None],
+                 on_idle: Callable[[], None]=None) -> None:
+        self.widget = widget
+        self.job = job
+        self.on_result = on_result
+        self.on_idle = on_idle
+
+        self.results = queue.Queue()
+        self.requested = threading.Event()
+        self.submitted = 0
+        self.completed = 0
+        self.polling = None
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    @property
+    def busy(self) -> bool:
+        return self.completed < self.submitted or not self.results.empty()
+
+    def request(self) -> None:
+        self.submitted += 1
+        self.requested.set()
+        if self.polling is None:
+            self.polling = self.widget.after(POLL_INTERVAL, self.poll)
+
+    def run(self) -> None:
+        while True:
+            self.requested.wait()
+            self.requested.clear()
+            target = self.submitted
+            try:
+                self.results.put((True, self.job()))
+            except Exception as error:
+                self.results.put((False, error))
+            self.completed = target
+
+    def poll(self) -> None:
+        self.polling = None
+        errors = []
+        while not self.results.empty():
+            finished, result = self.results.get()
+            if finished:
+                self.on_result(result)
+            else:
+                errors.append(result)
+        if self.busy:
+            self.polling = self.widget.after(POLL_INTERVAL, self.poll)
+        elif self.on_idle is not None:
+            self.on_idle()
+        if errors:
+            raise errors[-1]